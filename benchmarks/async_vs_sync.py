@@ -0,0 +1,195 @@
+"""
+Throughput of the movie listing read through the sync session, in the thread
+pool, and through the async session, under many concurrent clients.
+
+The server runs in its own process on a copy of the example catalog, the
+clients share one event loop in this process.
+
+Usage, from the repository root:
+
+    python -m benchmarks.async_vs_sync [--clients 500] [--duration 10]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+import httpx
+
+
+def create_app():
+    """The two versions of the listing, served by the benchmark server."""
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+    from db import db_movies
+    from db.database import get_async_db, get_db
+    from schemas.movies_schemas import MovieDisplayAll
+
+    app = FastAPI()
+
+    @app.get("/sync", response_model=List[MovieDisplayAll])
+    def list_movies_sync(limit: int = 10, db: Session = Depends(get_db)):
+        movies, _ = db_movies.get_all_movies(db=db, limit=limit)
+        return movies
+
+    @app.get("/async", response_model=List[MovieDisplayAll])
+    async def list_movies_async(
+        limit: int = 10,
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        movies, _ = await db_movies.get_all_movies_async(db=db, limit=limit)
+        return movies
+
+    return app
+
+
+def create_catalog():
+    from db import bulk_import
+    from db.database import SessionLocal
+    from db.seed_db import create_tables_and_seed
+
+    create_tables_and_seed()
+    with SessionLocal() as db:
+        bulk_import.import_paths(
+            db=db,
+            paths={
+                kind: bulk_import.EXAMPLE_FILES[kind]
+                for kind in ("actors", "directors", "movies")
+            },
+        )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "--factory",
+            "benchmarks.async_vs_sync:create_app",
+            "--port",
+            str(port),
+            "--log-level",
+            "critical",
+            "--backlog",
+            "4096",
+        ],
+        env=os.environ.copy(),
+        # The requests left over at the end of a run fail when it stops
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("The benchmark server did not start.")
+
+
+def stop_server(server: subprocess.Popen):
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+async def run_clients(
+    url: str,
+    clients: int,
+    duration: float,
+):
+    latencies = []
+    errors = 0
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+                response.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    async with httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=clients),
+        timeout=60,
+    ) as client:
+        # Warm up the connections and the server
+        await asyncio.gather(
+            *(client.get(url) for _ in range(min(clients, 50))),
+            return_exceptions=True,
+        )
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+    return latencies, errors
+
+
+def report(
+    name: str,
+    latencies: list,
+    errors: int,
+    duration: float,
+):
+    if not latencies:
+        print(f"{name:>6}: no successful request, {errors} errors")
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:>6}: {len(latencies) / duration:8.1f} req/s, "
+        f"p50 {quantiles[49] * 1000:7.1f} ms, p99 {quantiles[98] * 1000:7.1f} ms, "
+        f"{errors} errors"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--limit", type=int, default=10, help="Movies per page.")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'movies.db')}"
+    create_catalog()
+    print(f"{args.clients} concurrent clients, {args.duration:g} s per run")
+    for name in ("sync", "async"):
+        # A server per run: the requests still queued at the end of a run
+        # would slow down the next one
+        port = free_port()
+        server = start_server(port)
+        try:
+            latencies, errors = asyncio.run(
+                run_clients(
+                    f"http://127.0.0.1:{port}/{name}?limit={args.limit}",
+                    args.clients,
+                    args.duration,
+                )
+            )
+        finally:
+            stop_server(server)
+        report(name, latencies, errors, args.duration)
+
+
+if __name__ == "__main__":
+    main()
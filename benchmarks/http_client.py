@@ -0,0 +1,116 @@
+"""
+Latency of the movie extra data calls with a new HTTP client per call, as
+before the shared client, and with the shared keep-alive client of
+services.movie_service.
+
+The calls go to a local stub of the movie database answering over plain
+HTTP, so the gain measured leaves out the TLS handshakes saved as well.
+
+Usage, from the repository root:
+
+    python -m benchmarks.http_client [--calls 300]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+
+STUB_RESPONSE = json.dumps(
+    {
+        "Response": "True",
+        "imdbRating": "8.1",
+        "imdbVotes": "1,234,567",
+        "Language": "English",
+        "Country": "United States",
+    }
+).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keeps the connections open between requests, as the real API does
+    protocol_version = "HTTP/1.1"
+    # The headers and the body are written separately, Nagle's algorithm
+    # would hold the body back until the delayed ACK of the client
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def client_per_call(url: str):
+    async with httpx.AsyncClient() as client:
+        response = await client.get(url, params={"r": "json", "i": "tt0000001"})
+        response.raise_for_status()
+        return response.json()
+
+
+async def measure(
+    call,
+    calls: int,
+):
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(calls: int, url: str):
+    from services import movie_service
+
+    results = {
+        "client per call": await measure(lambda: client_per_call(url), calls),
+    }
+    await movie_service.start_http_client()
+    try:
+        results["shared client"] = await measure(
+            lambda: movie_service.request_movie_extra_data("tt0000001"), calls
+        )
+    finally:
+        await movie_service.close_http_client()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=300)
+    args = parser.parse_args()
+
+    stub = start_stub()
+    url = f"http://127.0.0.1:{stub.server_address[1]}/"
+    # Read by config.py when services.movie_service is imported
+    os.environ["MOVIE_DATA_API_URL"] = url
+    try:
+        results = asyncio.run(run(args.calls, url))
+    finally:
+        stub.shutdown()
+    print(f"{args.calls} sequential calls to a local stub")
+    for name, latencies in results.items():
+        print(
+            f"{name:>15}: mean {statistics.mean(latencies) * 1000:6.2f} ms, "
+            f"p99 {statistics.quantiles(latencies, n=100)[98] * 1000:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
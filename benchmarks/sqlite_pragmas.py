@@ -0,0 +1,132 @@
+"""
+Read and write throughput of SQLite under a mixed load, with the default
+settings and with the tuning profile of SQLITE_PRAGMAS.
+
+Reader threads look rows up by id while writer threads update and commit
+one row at a time, each on its own connection, on a new database file per
+run.
+
+Usage, from the repository root:
+
+    python -m benchmarks.sqlite_pragmas [--rows 10000] [--readers 4]
+        [--writers 2] [--duration 3]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+from config import SQLITE_PRAGMAS
+from db.database import set_sqlite_pragmas
+
+
+def create_database(
+    path: str,
+    rows: int,
+    tuned: bool,
+):
+    # Each thread opens its own connection, as the pooled ones would be
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        poolclass=NullPool,
+    )
+    if tuned:
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE items (id INTEGER PRIMARY KEY, counter INTEGER, name TEXT)"
+        )
+        connection.execute(
+            text("INSERT INTO items (id, counter, name) VALUES (:id, 0, :name)"),
+            [{"id": i, "name": f"item {i}"} for i in range(rows)],
+        )
+    return engine
+
+
+def run_load(
+    engine,
+    rows: int,
+    readers: int,
+    writers: int,
+    duration: float,
+):
+    counts = {"reads": 0, "writes": 0, "busy": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def read():
+        done = 0
+        with engine.connect() as connection:
+            while time.perf_counter() < deadline:
+                connection.execute(
+                    text("SELECT name, counter FROM items WHERE id = :id"),
+                    {"id": random.randrange(rows)},
+                ).first()
+                connection.commit()
+                done += 1
+        with lock:
+            counts["reads"] += done
+
+    def write():
+        done = busy = 0
+        with engine.connect() as connection:
+            while time.perf_counter() < deadline:
+                try:
+                    connection.execute(
+                        text("UPDATE items SET counter = counter + 1 WHERE id = :id"),
+                        {"id": random.randrange(rows)},
+                    )
+                    connection.commit()
+                    done += 1
+                except OperationalError:
+                    # "database is locked", once the busy timeout is over
+                    connection.rollback()
+                    busy += 1
+        with lock:
+            counts["writes"] += done
+            counts["busy"] += busy
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    threads += [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{args.readers} readers, {args.writers} writers, {args.rows} rows, "
+        f"{args.duration:g} s per run"
+    )
+    pragmas = ", ".join(f"{name}={value}" for name, value in SQLITE_PRAGMAS.items())
+    print(f"profile: {pragmas}")
+    directory = tempfile.mkdtemp()
+    for name, tuned in (("default", False), ("profile", True)):
+        engine = create_database(
+            os.path.join(directory, f"{name}.db"), args.rows, tuned
+        )
+        counts = run_load(engine, args.rows, args.readers, args.writers, args.duration)
+        engine.dispose()
+        print(
+            f"{name:>8}: {counts['reads'] / args.duration:9.0f} reads/s, "
+            f"{counts['writes'] / args.duration:8.0f} writes/s, "
+            f"{counts['busy']} locked errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
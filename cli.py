@@ -0,0 +1,103 @@
+import argparse
+import json
+import sys
+import time
+from db import bulk_import, db_movies, export
+from db.database import SessionLocal
+
+
+def recompute_ratings(args):
+    with SessionLocal() as db:
+        drifted = db_movies.recompute_rating_aggregates(
+            db=db,
+            dry_run=args.dry_run,
+        )
+    action = "Found" if args.dry_run else "Fixed"
+    print(f"{action} {len(drifted)} movie(s) with drifted rating aggregates.")
+    for movie in drifted:
+        print(json.dumps(movie))
+
+
+def import_catalog(args):
+    paths = {
+        kind: getattr(args, kind) or (args.examples and bulk_import.EXAMPLE_FILES[kind])
+        for kind in bulk_import.IMPORT_ORDER
+    }
+    paths = {kind: path for kind, path in paths.items() if path}
+    if not paths:
+        raise SystemExit("Nothing to import, give a file or --examples.")
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        try:
+            summary = bulk_import.import_paths(db=db, paths=paths)
+        except bulk_import.InvalidRecord as error:
+            raise SystemExit(
+                f"Nothing imported, invalid {error.kind} record at index "
+                f"{error.index}: {error.errors}"
+            )
+    print(f"Imported in {time.perf_counter() - started:.2f}s")
+    for kind, counts in summary.items():
+        print(f"{kind}: {counts['imported']} imported, {counts['skipped']} skipped")
+
+
+def export_catalog(args):
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        for line in export.iter_export(kind=args.kind, export_format=args.format):
+            output.write(line)
+    finally:
+        if args.output:
+            output.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MoviesDB admin commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recompute = commands.add_parser(
+        "recompute-ratings",
+        help="Verify and fix the stored movie rating aggregates.",
+    )
+    recompute.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report the drifted movies.",
+    )
+    recompute.set_defaults(func=recompute_ratings)
+
+    importer = commands.add_parser(
+        "import",
+        help="Import JSON array files of actors, directors, movies and reviews.",
+    )
+    for kind in bulk_import.IMPORT_ORDER:
+        importer.add_argument(f"--{kind}", metavar="PATH", help=f"File of {kind}.")
+    importer.add_argument(
+        "--examples",
+        action="store_true",
+        help="Import the files of example_files/ not given explicitly.",
+    )
+    importer.set_defaults(func=import_catalog)
+
+    exporter = commands.add_parser(
+        "export",
+        help="Export the movies, reviews or users as NDJSON or CSV.",
+    )
+    exporter.add_argument("kind", choices=list(export.EXPORTS))
+    exporter.add_argument(
+        "--format",
+        choices=list(export.EXPORT_FORMATS),
+        default="ndjson",
+    )
+    exporter.add_argument(
+        "--output",
+        metavar="PATH",
+        help="File to write, the standard output by default.",
+    )
+    exporter.set_defaults(func=export_catalog)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
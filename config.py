@@ -0,0 +1,73 @@
+import os
+from dotenv import load_dotenv
+
+# Settings are read once, when the application starts.
+load_dotenv()
+
+# Share of the movie views that are recorded (0 < rate <= 1). Sampled views
+# are weighted by 1 / rate, so requests_count stays an estimate of the total.
+VIEW_SAMPLE_RATE = float(os.getenv("VIEW_SAMPLE_RATE", "1.0"))
+# Seconds between two flushes of the buffered movie views to the database.
+VIEW_FLUSH_INTERVAL = float(os.getenv("VIEW_FLUSH_INTERVAL", "5"))
+# In-process cache of the serialized catalog responses.
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+# SQLite tuning profile, applied to every new connection. Empty values keep
+# the SQLite default for that pragma.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # Negative values are in KiB: -65536 is a 64 MiB page cache.
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT", "5000"),
+}
+# Database connection. ASYNC_DATABASE_URL defaults to DATABASE_URL with the
+# async driver of its dialect (aiosqlite for SQLite, asyncpg for Postgres).
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./moviesDB.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+# Connection pool of each engine.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# External movie database used for the extra data of the movies.
+RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
+MOVIE_DATA_API_URL = os.getenv(
+    "MOVIE_DATA_API_URL", "https://movie-database-alternative.p.rapidapi.com/"
+)
+MOVIE_DATA_API_HOST = os.getenv(
+    "MOVIE_DATA_API_HOST", "movie-database-alternative.p.rapidapi.com"
+)
+# Shared HTTP client: timeouts in seconds and connection pool limits.
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+# Seconds during which the stored extra data of a movie is served without
+# asking the external movie database again.
+EXTRA_DATA_TTL = int(os.getenv("EXTRA_DATA_TTL", str(24 * 60 * 60)))
+# Upstream lookups run at the same time by one batch extra data request, and
+# by the background refreshes of the stale entries.
+EXTRA_DATA_CONCURRENCY = int(os.getenv("EXTRA_DATA_CONCURRENCY", "10"))
+# Seconds allowed to the external movie database to answer a call, waiting
+# for a free connection of the shared client excluded, and circuit breaker
+# failing fast while that service is down.
+EXTRA_DATA_DEADLINE = float(os.getenv("EXTRA_DATA_DEADLINE", "3"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RECOVERY_TIMEOUT = float(os.getenv("BREAKER_RECOVERY_TIMEOUT", "30"))
+BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv("BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+# Poster uploads are streamed to disk in chunks and rejected above this size.
+# An upload announcing a larger Content-Length is rejected before its body is
+# received; a chunked upload is received whole first, then rejected.
+POSTER_MAX_SIZE = int(os.getenv("POSTER_MAX_SIZE", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+# Worker processes resizing the uploaded posters.
+POSTER_WORKERS = int(os.getenv("POSTER_WORKERS", "2"))
+# Trigram similarity (0 to 1) from which a new movie released the same year
+# as an existing one is rejected as a duplicate of it.
+DUPLICATE_TITLE_SIMILARITY = float(os.getenv("DUPLICATE_TITLE_SIMILARITY", "0.6"))
@@ -0,0 +1,407 @@
+import io
+import json
+import random
+from pydantic import ValidationError
+from sqlalchemy import bindparam, case, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import coalesce
+from db.changes import CHANGE_COUNTERS, bump_changes
+from db.models import (
+    DbActor,
+    DbCategory,
+    DbDirector,
+    DbMovie,
+    DbMovieActor,
+    DbReview,
+    DbUser,
+    movie_categories,
+)
+from db.search import title_key
+from db.suggest_index import suggest_index
+from schemas.actors_schemas import ActorAutoUpdate
+from schemas.directors_schemas import Director
+from schemas.movies_schemas import MovieBase
+from schemas.reviews_schemas import CreateReview
+from services.response_cache import caches
+
+# Rows validated and inserted together, so the memory used does not depend
+# on the size of the imported files. The inserts go through the Core tables,
+# skipping the ORM unit of work.
+BATCH_SIZE = 5000
+READ_SIZE = 64 * 1024
+
+EXAMPLE_FILES = {
+    "actors": "example_files/example_actors.json",
+    "directors": "example_files/example_directors.json",
+    "movies": "example_files/example_movies.json",
+    "reviews": "example_files/example_reviews.json",
+}
+# Order in which the kinds are imported, so foreign keys can be resolved
+IMPORT_ORDER = ["actors", "directors", "movies", "reviews"]
+
+
+class InvalidRecord(ValueError):
+    """
+    A record of an imported file that is not valid JSON or does not match
+    its schema, at `index` in the array of its `kind`.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        errors: list,
+    ):
+        super().__init__(f"Invalid record at index {index}: {errors}")
+        self.kind = None
+        self.index = index
+        self.errors = errors
+
+
+# Where iter_json_array is in the array: before its "[", before its first
+# item or its "]", before an item, after an item, after its "]"
+ARRAY_START, ARRAY_FIRST, ARRAY_ITEM, ARRAY_NEXT, ARRAY_END = range(5)
+JSON_WHITESPACE = " \t\r\n"
+
+
+def iter_json_array(file):
+    """
+    Yields the items of the JSON array read from a text file one at a time,
+    without loading the whole file.
+
+    Raises:
+    - InvalidRecord: The file is not a JSON array, at the index of the item
+      where it stops being one.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    index = 0
+    state = ARRAY_START
+    while True:
+        chunk = file.read(READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in JSON_WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if state == ARRAY_START:
+                if char != "[":
+                    raise InvalidRecord(index, ["Expecting '['"])
+                state = ARRAY_FIRST
+            elif state == ARRAY_END:
+                raise InvalidRecord(index, ["Extra data after ']'"])
+            elif char == "]" and state in (ARRAY_FIRST, ARRAY_NEXT):
+                state = ARRAY_END
+            elif state == ARRAY_NEXT:
+                if char != ",":
+                    raise InvalidRecord(index, ["Expecting ',' delimiter"])
+                state = ARRAY_ITEM
+            elif char in ",]":
+                raise InvalidRecord(index, ["Expecting value"])
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as error:
+                    if not chunk:
+                        raise InvalidRecord(index, [error.msg]) from error
+                    # The item continues in the next chunk
+                    break
+                if end == len(buffer) and chunk:
+                    # A number can continue in the next chunk
+                    break
+                position = end
+                state = ARRAY_NEXT
+                index += 1
+                yield item
+                continue
+            position += 1
+        if not chunk:
+            if state == ARRAY_START:
+                raise InvalidRecord(index, ["Expecting '['"])
+            if state != ARRAY_END:
+                raise InvalidRecord(index, ["Expecting ']'"])
+            return
+
+
+def parse_records(
+    records,
+    schema,
+):
+    """
+    Validates the records with the schema.
+
+    Raises:
+    - InvalidRecord: The first record that is not valid JSON or does not
+      match the schema.
+
+    Returns:
+    - The (record, validated record) pairs.
+    """
+    for index, record in enumerate(records):
+        try:
+            validated = schema.model_validate(record)
+        except ValidationError as error:
+            raise InvalidRecord(
+                index, error.errors(include_url=False, include_context=False)
+            ) from error
+        yield record, validated
+
+
+def batches(items, size: int = BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_named(
+    db: Session,
+    records,
+    model,
+    schema,
+    name_column,
+):
+    """
+    Inserts the records whose name is not taken yet, names being unique.
+    """
+    names = set(db.scalars(select(name_column)))
+    imported = skipped = 0
+    for batch in batches(parse_records(records, schema)):
+        rows = []
+        for _, record in batch:
+            row = record.model_dump()
+            if row[name_column.key] in names:
+                skipped += 1
+                continue
+            names.add(row[name_column.key])
+            rows.append(row)
+        if rows:
+            db.execute(insert(model.__table__), rows)
+        imported += len(rows)
+    return {"imported": imported, "skipped": skipped}
+
+
+def import_actors(
+    db: Session,
+    records,
+):
+    return import_named(db, records, DbActor, ActorAutoUpdate, DbActor.actor_name)
+
+
+def import_directors(
+    db: Session,
+    records,
+):
+    return import_named(
+        db, records, DbDirector, Director, DbDirector.director_name
+    )
+
+
+def insert_movies(
+    db: Session,
+    rows: list,
+):
+    """
+    Inserts the movies with one executemany and returns their new ids, in
+    the order of the rows.
+    """
+    movies = DbMovie.__table__
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite can only return the ids in order one row at a time. The
+        # transaction holds the write lock from the insert on, and the new
+        # rowids follow each other, so the last ids are the inserted ones.
+        db.execute(insert(movies), rows)
+        movie_ids = db.scalars(
+            select(movies.c.id).order_by(movies.c.id.desc()).limit(len(rows))
+        ).all()
+        return movie_ids[::-1]
+    return db.scalars(
+        insert(movies).returning(movies.c.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+
+
+def import_movies(
+    db: Session,
+    records,
+):
+    """
+    Inserts the movies and their actor and category links. Movies whose
+    director does not exist are skipped, unknown actors and categories are
+    ignored, as when the movies are created one by one.
+    """
+    director_ids = set(db.scalars(select(DbDirector.id)))
+    actor_ids = set(db.scalars(select(DbActor.id)))
+    category_ids = set(db.scalars(select(DbCategory.id)))
+    imported = skipped = 0
+    for batch in batches(parse_records(records, MovieBase)):
+        movies = []
+        for _, movie in batch:
+            if movie.director_id not in director_ids:
+                skipped += 1
+                continue
+            movies.append(movie)
+        if not movies:
+            continue
+        movie_ids = insert_movies(
+            db,
+            [
+                {
+                    **movie.model_dump(exclude={"actors", "categories"}),
+                    "title_key": title_key(movie.title),
+                }
+                for movie in movies
+            ],
+        )
+        actor_rows = [
+            {"movie_id": movie_id, "actor_id": actor_id}
+            for movie_id, movie in zip(movie_ids, movies)
+            for actor_id in set(movie.actors or []) & actor_ids
+        ]
+        category_rows = [
+            {"movie_id": movie_id, "category_id": category_id}
+            for movie_id, movie in zip(movie_ids, movies)
+            for category_id in set(movie.categories) & category_ids
+        ]
+        if actor_rows:
+            db.execute(insert(DbMovieActor.__table__), actor_rows)
+        if category_rows:
+            db.execute(insert(movie_categories), category_rows)
+        imported += len(movies)
+    return {"imported": imported, "skipped": skipped}
+
+
+def rating_changes_statement():
+    movies = DbMovie.__table__
+    rating_sum = coalesce(movies.c.rating_sum, 0) + bindparam("b_rating_sum")
+    reviews_count = coalesce(movies.c.reviews_count, 0) + bindparam("b_count")
+    return (
+        update(movies)
+        .where(movies.c.id == bindparam("b_movie_id"))
+        .values(
+            rating_sum=rating_sum,
+            reviews_count=reviews_count,
+            version=coalesce(movies.c.version, 0) + 1,
+            average_movie_rate=case(
+                (reviews_count > 0, rating_sum / reviews_count),
+                else_=0.0,
+            ),
+        )
+    )
+
+
+def import_reviews(
+    db: Session,
+    records,
+):
+    """
+    Inserts the reviews and adds them to the rating aggregates of their
+    movies. Reviews of unknown movies are skipped. Reviews without a user_id
+    are given to a random existing user.
+    """
+    movie_ids = set(db.scalars(select(DbMovie.id)))
+    user_ids = list(db.scalars(select(DbUser.id)))
+    known_users = set(user_ids)
+    imported = skipped = 0
+    for batch in batches(parse_records(records, CreateReview)):
+        rows = []
+        for record, review in batch:
+            review = review.model_dump()
+            user_id = record.get("user_id")
+            if user_id is None and user_ids:
+                user_id = random.choice(user_ids)
+            if review["movie_id"] not in movie_ids or user_id not in known_users:
+                skipped += 1
+                continue
+            rows.append({**review, "user_id": user_id})
+        if not rows:
+            continue
+        db.execute(insert(DbReview.__table__), rows)
+        changes = {}
+        for row in rows:
+            rating_sum, count = changes.get(row["movie_id"], (0.0, 0))
+            changes[row["movie_id"]] = (rating_sum + row["user_rating"], count + 1)
+        db.execute(
+            rating_changes_statement(),
+            [
+                {"b_movie_id": movie_id, "b_rating_sum": rating_sum, "b_count": count}
+                for movie_id, (rating_sum, count) in changes.items()
+            ],
+        )
+        imported += len(rows)
+    return {"imported": imported, "skipped": skipped}
+
+
+IMPORTERS = {
+    "actors": import_actors,
+    "directors": import_directors,
+    "movies": import_movies,
+    "reviews": import_reviews,
+}
+
+
+def import_files(
+    db: Session,
+    files: dict,
+):
+    """
+    Imports JSON array files in a single transaction.
+
+    Parameters:
+    - files (dict): Text or binary file objects by kind, one of
+      actors, directors, movies and reviews.
+
+    Raises:
+    - InvalidRecord: A record is not valid, nothing is imported then.
+
+    Returns:
+    - The number of imported and skipped records by kind.
+    """
+    summary = {}
+    try:
+        for kind in IMPORT_ORDER:
+            if kind not in files:
+                continue
+            file = files[kind]
+            if isinstance(file.read(0), bytes):
+                file = io.TextIOWrapper(file, encoding="utf-8")
+            try:
+                summary[kind] = IMPORTERS[kind](db, iter_json_array(file))
+            except InvalidRecord as error:
+                error.kind = kind
+                raise
+        # The inserts are done in SQL, outside of the session change tracking
+        bump_changes(
+            db.connection(),
+            [kind for kind in summary if kind in CHANGE_COUNTERS],
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    for cache in caches.values():
+        cache.invalidate()
+    # The command line imports run without the API, nothing to reload then
+    if suggest_index.loaded:
+        suggest_index.reload()
+    return summary
+
+
+def import_paths(
+    db: Session,
+    paths: dict,
+):
+    """Same as import_files, for file paths by kind."""
+    files = {kind: open(path, "r", encoding="utf-8") for kind, path in paths.items()}
+    try:
+        return import_files(db, files)
+    finally:
+        for file in files.values():
+            file.close()
@@ -0,0 +1,75 @@
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from db.models import (
+    DbActor,
+    DbCategory,
+    DbChangeCounter,
+    DbDirector,
+    DbMovie,
+    DbMovieActor,
+)
+
+# Change counters of the tables embedded in other resources. A counter only
+# moves forward, unlike a count or a sum of versions which a delete followed
+# by an insert can bring back to a previous value, so the ETags built from
+# them never repeat after a change.
+CHANGE_COUNTERS = ("movies", "actors", "directors", "categories")
+
+TRACKED_MODELS = {
+    DbMovie: ("movies",),
+    DbActor: ("actors",),
+    DbDirector: ("directors",),
+    DbCategory: ("categories",),
+    # A link shows in the movie and in the actor
+    DbMovieActor: ("movies", "actors"),
+}
+
+
+def change_counter(name: str):
+    """Scalar subquery of the current value of a change counter."""
+    return (
+        select(DbChangeCounter.value)
+        .where(DbChangeCounter.name == name)
+        .scalar_subquery()
+    )
+
+
+def bump_changes(
+    connection: Connection,
+    names,
+):
+    """Increments the change counters, in the transaction of the change."""
+    for name in sorted(set(names)):
+        result = connection.execute(
+            update(DbChangeCounter)
+            .where(DbChangeCounter.name == name)
+            .values(value=DbChangeCounter.value + 1)
+        )
+        # Counters are created with the tables, this covers a missing row
+        if not result.rowcount:
+            connection.execute(insert(DbChangeCounter).values(name=name, value=1))
+
+
+def seed_change_counters(session: Session):
+    existing = set(session.scalars(select(DbChangeCounter.name)))
+    for name in CHANGE_COUNTERS:
+        if name not in existing:
+            session.add(DbChangeCounter(name=name, value=0))
+    session.commit()
+
+
+@event.listens_for(Session, "after_flush")
+def count_flushed_changes(session, flush_context):
+    """
+    Bumps the counters of the tables written by the ORM. Core statements do
+    not go through the session and bump them with bump_changes.
+    """
+    names = set()
+    for row in (*session.new, *session.deleted):
+        names.update(TRACKED_MODELS.get(type(row), ()))
+    for row in session.dirty:
+        if session.is_modified(row):
+            names.update(TRACKED_MODELS.get(type(row), ()))
+    if names:
+        bump_changes(session.connection(), names)
@@ -1,12 +1,82 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLITE_PRAGMAS,
+)
+from db.pool import MonitoredAsyncQueuePool, MonitoredQueuePool, PoolMetricsMixin
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def is_memory_database(url):
+    """In-memory SQLite databases only exist within their connection."""
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def shared_memory_url(url):
+    """
+    Turns a private in-memory SQLite URL into a named in-memory database
+    shared by the connections of the process, so the sync and async engines
+    see the same tables.
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        return url
+    return url.set(
+        database="file:moviesdb",
+        query={"mode": "memory", "cache": "shared", "uri": "true"},
+    )
+
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./moviesDB.db"
+def async_database_url(url: str):
+    """Returns `url` with the async driver of its dialect."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
 
+
+SQLALCHEMY_DATABASE_URL = shared_memory_url(DATABASE_URL)
+ASYNC_SQLALCHEMY_DATABASE_URL = shared_memory_url(
+    ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+)
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.get_backend_name() == "sqlite"
+
+
+pool_settings = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+# An in-memory database disappears with its last connection, and a private
+# one exists in a single connection: all the threads share one connection
+# to it instead of a pool.
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
+    # SQLite connections are shared with the threads of the thread pool
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **(
+        {"poolclass": StaticPool}
+        if is_memory_database(SQLALCHEMY_DATABASE_URL)
+        else {"poolclass": MonitoredQueuePool, **pool_settings}
+    ),
 )
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -14,12 +84,64 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+# Used by the async routes, next to the sync engine on the same database
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **(
+        {"poolclass": StaticPool}
+        if is_memory_database(ASYNC_SQLALCHEMY_DATABASE_URL)
+        else {"poolclass": MonitoredAsyncQueuePool, **pool_settings}
+    ),
+)
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+    bind=async_engine,
+)
+
 Base = declarative_base()
 
 
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Applies the SQLite tuning profile from the settings to a new connection:
+    WAL lets readers run next to the writer, synchronous=NORMAL only fsyncs
+    at checkpoints, and the busy timeout makes writers wait for the lock
+    instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        if value:
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+
+def pool_stats(pool):
+    if isinstance(pool, PoolMetricsMixin):
+        return pool.stats()
+    return {"status": pool.status()}
+
+
+def get_pool_stats():
+    return {
+        "sync": pool_stats(engine.pool),
+        "async": pool_stats(async_engine.pool),
+    }
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
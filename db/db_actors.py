@@ -1,13 +1,21 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from schemas.actors_schemas import (
     Actor,
     ActorFullUpdate,
     ActorPatch,
 )
+from db.changes import change_counter
 from db.models import (
     DbActor,
     DbMovie,
 )
+from db.pagination import (
+    DEFAULT_PAGE_SIZE,
+    paginate,
+)
+from db.suggest_index import suggest_index
+from services.etags import bump_version, make_etag
+from services.response_cache import invalidate_actor
 
 
 def create_actor(
@@ -18,6 +26,7 @@ def create_actor(
     db.add(actor)
     db.commit()
     db.refresh(actor)
+    suggest_index.add("actor", actor.id, actor.actor_name)
     return actor
 
 
@@ -28,8 +37,37 @@ def get_actor(
     return db.query(DbActor).filter(DbActor.id == actor_id).first()
 
 
-def get_all_actors(db: Session):
-    return db.query(DbActor).all()
+def get_all_actors(
+    db: Session,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    return paginate(
+        query=db.query(DbActor).options(selectinload(DbActor.movies)),
+        columns=[DbActor.id],
+        cursor=cursor,
+        limit=limit,
+    )
+
+
+def get_actor_etag(
+    db: Session,
+    actor_id: int,
+):
+    """
+    Returns the ETag of the actor from its version and the change counter of
+    the movies it lists. Returns None if the actor does not exist.
+    """
+    versions = (
+        db.query(
+            DbActor.id,
+            DbActor.version,
+            change_counter("movies"),
+        )
+        .filter(DbActor.id == actor_id)
+        .first()
+    )
+    return make_etag("actor", *versions) if versions else None
 
 
 def update_actor(
@@ -50,8 +88,11 @@ def update_actor(
                 if new_movie.id not in current_movie_ids:
                     actor.movies.append(new_movie)
 
+    bump_version(actor)
     db.commit()
     db.refresh(actor)
+    invalidate_actor(actor.id)
+    suggest_index.add("actor", actor.id, actor.actor_name)
     return actor
 
 
@@ -72,8 +113,11 @@ def patch_actor(
                 if new_movie.id not in current_movie_ids:
                     actor.movies.append(new_movie)
 
+    bump_version(actor)
     db.commit()
     db.refresh(actor)
+    invalidate_actor(actor.id)
+    suggest_index.add("actor", actor.id, actor.actor_name)
     return actor
 
 
@@ -85,6 +129,8 @@ def delete_actor(
     if actor:
         db.delete(actor)
         db.commit()
+        invalidate_actor(actor_id)
+        suggest_index.remove("actor", actor_id)
     return actor
 
 # TODO: Check if we need this functionality
@@ -1,6 +1,11 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from db.changes import change_counter
 from db.models import DbCategory
 from schemas.categories_schemas import CategoryBase
+from services.etags import bump_version, make_etag
+from services.response_cache import invalidate_categories
 
 
 # Create Category
@@ -12,6 +17,7 @@ def add_category(
     db.add(category)
     db.commit()
     db.refresh(category)
+    invalidate_categories()
     return category
 
 
@@ -20,6 +26,11 @@ def get_all_categories(db: Session):
     return db.query(DbCategory).all()
 
 
+# Get the ETag of the Categories list
+def get_categories_etag(db: Session):
+    return make_etag("categories", db.scalar(select(change_counter("categories"))))
+
+
 # Get Category By Id
 def get_category_with_id(
     db: Session,
@@ -28,15 +39,12 @@ def get_category_with_id(
     return db.query(DbCategory).filter(DbCategory.id == category_id).first()
 
 
-def get_category_with_name(
-    db: Session,
+async def get_category_with_name_async(
+    db: AsyncSession,
     category_name: str,
 ):
-    return (
-        db.query(DbCategory)
-        .filter(DbCategory.category_name == category_name)
-        .first()
-        .id
+    return await db.scalar(
+        select(DbCategory.id).where(DbCategory.category_name == category_name)
     )
 
 
@@ -49,8 +57,10 @@ def update_category(
     category = get_category_with_id(db, category_id)
     if category:
         category.category_name = request.category_name
+        bump_version(category)
         db.commit()
         db.refresh(category)
+        invalidate_categories()
     return category
 
 
@@ -63,5 +73,6 @@ def delete_category(
     if category:
         db.delete(category)
         db.commit()
+        invalidate_categories()
         return True
     return False
@@ -1,6 +1,11 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from db.changes import change_counter
 from db.models import DbDirector
+from db.pagination import DEFAULT_PAGE_SIZE, paginate
+from db.suggest_index import suggest_index
+from services.etags import bump_version, make_etag
+from services.response_cache import invalidate_director
 from schemas.directors_schemas import (
     Director,
     DirectorUpdate,
@@ -18,6 +23,7 @@ def create_director(
     db.add(new_director)
     db.commit()
     db.refresh(new_director)
+    suggest_index.add("director", new_director.id, new_director.director_name)
     return new_director
 
 
@@ -32,10 +38,32 @@ def get_director(
 # Get All Directors
 def get_all_directors(
     db: Session,
-    skip: int = 0,
-    limit: int = 100,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
-    return db.query(DbDirector).offset(skip).limit(limit).all()
+    return paginate(
+        query=db.query(DbDirector).options(selectinload(DbDirector.movies)),
+        columns=[DbDirector.id],
+        cursor=cursor,
+        limit=limit,
+    )
+
+
+# Get the ETag of a Director, from its version and the ones of its movies
+def get_director_etag(
+    db: Session,
+    director_id: int,
+):
+    versions = (
+        db.query(
+            DbDirector.id,
+            DbDirector.version,
+            change_counter("movies"),
+        )
+        .filter(DbDirector.id == director_id)
+        .first()
+    )
+    return make_etag("director", *versions) if versions else None
 
 
 # Update Director
@@ -54,8 +82,11 @@ def update_director(
             )
     elif request.movies == []:
         director.movies = []
+    bump_version(director)
     db.commit()
     db.refresh(director)
+    invalidate_director(director.id)
+    suggest_index.add("director", director.id, director.director_name)
     return director
 
 
@@ -72,6 +103,8 @@ def delete_director(
     if director:
         db.delete(director)
         db.commit()
+        invalidate_director(director_id)
+        suggest_index.remove("director", director_id)
         return f"Director with id {director_id} deleted successfully"
     else:
         raise HTTPException(
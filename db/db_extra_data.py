@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from config import EXTRA_DATA_CONCURRENCY, EXTRA_DATA_TTL
+from db.database import AsyncSessionLocal
+from db.models import DbMovieExtraData
+from services.movie_service import get_movie_extra_data
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Background refreshes in progress, by imdb_id. Keeping the tasks referenced
+# also stops them from being garbage collected before they finish.
+refresh_tasks: dict = {}
+# Concurrent misses of the same imdb_id share one upstream call and one write
+extra_data_flights = SingleFlight()
+# Background refreshes calling the external movie database at the same time,
+# whatever the number of requests that found stale entries
+refresh_semaphore = asyncio.Semaphore(EXTRA_DATA_CONCURRENCY)
+
+
+def is_fresh(entry: DbMovieExtraData):
+    return datetime.utcnow() < entry.fetched_at + timedelta(seconds=entry.ttl)
+
+
+async def get_stored_extra_data(imdb_id: str):
+    async with AsyncSessionLocal() as db:
+        return await db.get(DbMovieExtraData, imdb_id)
+
+
+async def get_stored_extra_data_batch(imdb_ids: list):
+    async with AsyncSessionLocal() as db:
+        entries = await db.scalars(
+            select(DbMovieExtraData).filter(DbMovieExtraData.imdb_id.in_(imdb_ids))
+        )
+        return {entry.imdb_id: entry for entry in entries}
+
+
+async def store_extra_data(
+    imdb_id: str,
+    payload: dict,
+):
+    values = {
+        "payload": payload,
+        "fetched_at": datetime.utcnow(),
+        "ttl": EXTRA_DATA_TTL,
+    }
+    statement = (
+        update(DbMovieExtraData)
+        .filter(DbMovieExtraData.imdb_id == imdb_id)
+        .values(**values)
+    )
+    async with AsyncSessionLocal() as db:
+        if (await db.execute(statement)).rowcount == 0:
+            try:
+                async with db.begin_nested():
+                    db.add(DbMovieExtraData(imdb_id=imdb_id, **values))
+            except IntegrityError:
+                # Inserted by a concurrent request in the meantime
+                await db.execute(statement)
+        await db.commit()
+
+
+async def fetch_and_store_extra_data(imdb_id: str):
+    payload = await get_movie_extra_data(imdb_id)
+    await store_extra_data(imdb_id=imdb_id, payload=payload)
+    return payload
+
+
+async def fetch_extra_data(imdb_id: str):
+    """
+    Asks the external movie database and stores the answer, once for all
+    the concurrent calls for the same imdb_id.
+    """
+    return await extra_data_flights.do(imdb_id, fetch_and_store_extra_data, imdb_id)
+
+
+async def refresh_extra_data(imdb_id: str):
+    try:
+        async with refresh_semaphore:
+            await fetch_extra_data(imdb_id)
+    except Exception:
+        # The stale payload stays in place and is served until the next try
+        logger.warning("Refreshing the extra data of %s failed", imdb_id)
+    finally:
+        refresh_tasks.pop(imdb_id, None)
+
+
+def schedule_refresh(imdb_id: str):
+    if imdb_id not in refresh_tasks:
+        refresh_tasks[imdb_id] = asyncio.create_task(refresh_extra_data(imdb_id))
+
+
+async def get_extra_data(
+    imdb_id: str,
+    entry: DbMovieExtraData = None,
+):
+    """
+    Returns the extra data of a movie, served from the movie_extra_data table:
+    - a fresh entry is returned as is,
+    - a stale entry is returned immediately while a refresh runs in the
+      background,
+    - a missing entry is fetched from the external movie database.
+
+    A failed refresh keeps serving the last known payload.
+
+    `entry` can be passed by callers that already loaded it.
+    """
+    if entry is None:
+        entry = await get_stored_extra_data(imdb_id)
+    if entry is not None and is_fresh(entry):
+        return entry.payload
+    if entry is not None:
+        schedule_refresh(imdb_id)
+        return entry.payload
+    return await fetch_extra_data(imdb_id)
+
+
+async def get_extra_data_batch(imdb_ids: list):
+    """
+    Returns the extra data of several movies, loading the stored entries with
+    one query and fetching the missing ones concurrently, at most
+    EXTRA_DATA_CONCURRENCY at a time. The stale ones are returned as they
+    are, their refreshes are limited the same way in the background.
+
+    Returns:
+    - A tuple of the payloads and of the error messages, both by imdb_id.
+    """
+    imdb_ids = list(dict.fromkeys(imdb_ids))
+    entries = await get_stored_extra_data_batch(imdb_ids)
+    semaphore = asyncio.Semaphore(EXTRA_DATA_CONCURRENCY)
+
+    async def get_one(imdb_id: str):
+        entry = entries.get(imdb_id)
+        if entry is not None:
+            return await get_extra_data(imdb_id, entry=entry)
+        async with semaphore:
+            return await get_extra_data(imdb_id, entry=entry)
+
+    results = await asyncio.gather(
+        *[get_one(imdb_id) for imdb_id in imdb_ids],
+        return_exceptions=True,
+    )
+    payloads, errors = {}, {}
+    for imdb_id, result in zip(imdb_ids, results):
+        if isinstance(result, HTTPException):
+            errors[imdb_id] = result.detail
+        elif isinstance(result, Exception):
+            logger.exception("Getting the extra data of %s failed", imdb_id, exc_info=result)
+            errors[imdb_id] = "Information was not available in www.movie_database"
+        else:
+            payloads[imdb_id] = result
+    return payloads, errors
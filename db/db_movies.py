@@ -1,37 +1,125 @@
-from datetime import datetime
-from sqlalchemy import func
+import asyncio
+import logging
+import math
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    extract,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import (
     Session,
     joinedload,
+    selectinload,
 )
 from sqlalchemy.sql.functions import coalesce
+from config import DUPLICATE_TITLE_SIMILARITY
+from db.changes import change_counter
 from db.models import (
     DbCategory,
     DbDirector,
     DbMovie,
     DbReview,
     DbActor,
-    DbMovieRequest,
+    DbMovieActor,
+    movie_categories,
+)
+from db.database import AsyncSessionLocal
+from db.db_extra_data import get_extra_data, get_extra_data_batch
+from db.pagination import (
+    DEFAULT_PAGE_SIZE,
+    keyset_page,
+    next_page,
+    paginate,
+    paginate_async,
 )
-from routes.directors import get_director_by_id
-from services.movie_service import get_movie_extra_data
+from db.search import match_expression, movies_fts, title_key
+from db.suggest_index import suggest_index
+from db.view_counter import view_counter
+from routes.directors import get_director_or_404
+from services.etags import bump_version, make_etag
+from services.poster_variants import (
+    POSTER_FAILED,
+    POSTER_PENDING,
+    POSTER_READY,
+    generate_variants_async,
+    variants_available,
+)
+from services.response_cache import invalidate_movie, movie_cache
 from schemas.movies_schemas import (
     MovieBase,
     MoviePatchUpdate,
     MovieUpdate,
 )
 
+logger = logging.getLogger(__name__)
+
+# Poster variants being generated. Keeping the tasks referenced stops them
+# from being garbage collected before they finish.
+poster_tasks = set()
+
 
 def check_director(
     director_id: int,
     db: Session,
 ):
-    return get_director_by_id(
+    return get_director_or_404(
         director_id=director_id,
         db=db,
     ).id
 
 
+def check_duplicate_title(
+    db: Session,
+    request: MovieBase,
+):
+    """
+    Rejects the title of a new movie when it is already taken, ignoring case
+    and accents, using the indexed title_key. The suggest index then reports
+    the movies with a similar title, typos included, released the same year.
+
+    Raises:
+    - HTTPException: 409 error if a movie has the same title, or a similar
+      title and was released the same year.
+    """
+    movie = (
+        db.query(DbMovie)
+        .filter(DbMovie.title_key == title_key(request.title))
+        .first()
+    )
+    if movie is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A movie with the title {movie.title} already exists.",
+        )
+    # Without a release date there is no year to compare
+    if request.released_date is None:
+        return
+    matches = suggest_index.similar(
+        request.title,
+        kind="movie",
+        threshold=DUPLICATE_TITLE_SIMILARITY,
+    )
+    if not matches:
+        return
+    movie = (
+        db.query(DbMovie)
+        .filter(
+            DbMovie.id.in_([movie_id for _, movie_id, _, _ in matches]),
+            extract("year", DbMovie.released_date) == request.released_date.year,
+        )
+        .first()
+    )
+    if movie is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A movie with the similar title {movie.title} "
+            f"was released the same year (ID: {movie.id}).",
+        )
+
+
 def create_movie(
     db: Session,
     request: MovieBase,
@@ -53,39 +141,108 @@ def create_movie(
     db.add(new_movie)
     db.commit()
     db.refresh(new_movie)
+    invalidate_movie(new_movie.id)
+    suggest_index.add("movie", new_movie.id, new_movie.title)
 
     return new_movie
 
 
-def get_all_movies(
-    db: Session,
-    skip: int = 0,
-    limit: int = 100,
+def movie_filters(
+    actor_id: int = None,
+    director_id: int = None,
+    category_id: int = None,
 ):
-    movies = db.query(DbMovie).filter(DbMovie.movie_active).all()
-    for movie in movies:
-        movie.average_movie_rate = calculate_average(
-            db=db,
-            movie=movie,
+    """
+    Returns the WHERE criteria selecting the active movies matching the
+    optional filters, so that only those rows are returned by the database.
+    """
+    criteria = [DbMovie.movie_active]
+    if actor_id is not None:
+        criteria.append(
+            DbMovie.id.in_(
+                select(DbMovieActor.movie_id).where(
+                    DbMovieActor.actor_id == actor_id,
+                )
+            )
         )
-        movie.reviews_count = calculate_reviews(
-            db=db,
-            movie=movie,
+    if category_id is not None:
+        criteria.append(
+            DbMovie.id.in_(
+                select(movie_categories.c.movie_id).where(
+                    movie_categories.c.category_id == category_id,
+                )
+            )
         )
-        movie.director_name = (
-            db.query(DbDirector.director_name)
-            .filter(DbDirector.id == movie.director_id)
-            .first()
+    if director_id is not None:
+        criteria.append(DbMovie.director_id == director_id)
+    return criteria
+
+
+def build_movies_query(
+    db: Session,
+    actor_id: int = None,
+    director_id: int = None,
+    category_id: int = None,
+):
+    return db.query(DbMovie).filter(
+        *movie_filters(
+            actor_id=actor_id,
+            director_id=director_id,
+            category_id=category_id,
         )
-    return movies
+    )
+
+
+def movie_listing_options():
+    return (
+        joinedload(DbMovie.director),
+        selectinload(DbMovie.actors),
+        selectinload(DbMovie.categories),
+    )
+
+
+# The top movies ranking is served by the (average_movie_rate, id) index,
+# so the database stops after the first top_movies matching rows.
+TOP_MOVIES_COLUMNS = [DbMovie.average_movie_rate, DbMovie.id]
+
+
+def get_all_movies(
+    db: Session,
+    actor_id: int = None,
+    director_id: int = None,
+    category_id: int = None,
+    top_movies: int = None,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    query = build_movies_query(
+        db=db,
+        actor_id=actor_id,
+        director_id=director_id,
+        category_id=category_id,
+    ).options(*movie_listing_options())
+    if top_movies:
+        movies, _ = paginate(
+            query=query,
+            columns=TOP_MOVIES_COLUMNS,
+            limit=top_movies,
+            descending=True,
+        )
+        return movies, None
+    return paginate(
+        query=query,
+        columns=[DbMovie.id],
+        cursor=cursor,
+        limit=limit,
+    )
 
 
 def get_movie(
     db: Session,
     movie_id: int = None,
     movie_title: str = None,
-    user_id: int = None,
 ):
+    movie = None
     if movie_id is not None:
         movie = (
             db.query(DbMovie)
@@ -101,26 +258,38 @@ def get_movie(
             .first()
         )
 
-    if movie:
-        movie.reviews_count = calculate_reviews(
-            db=db,
-            movie=movie,
-        )
-        movie.average_movie_rate = calculate_average(
-            db=db,
-            movie=movie,
-        )
+    return movie
 
-        movie.requests_count += 1
 
-        create_request_log(
-            db=db,
-            movie_id=movie.id,
-            user_id=user_id,
+def movie_versions_statement(movie_id: int):
+    """
+    Selects the versions of the movie and of its director, and the change
+    counters of the actors and categories it embeds, without loading them.
+    """
+    return (
+        select(
+            DbMovie.id,
+            DbMovie.version,
+            DbMovie.director_id,
+            DbDirector.version,
+            change_counter("actors"),
+            change_counter("categories"),
         )
-        db.commit()
-        db.refresh(movie)
-    return movie
+        .outerjoin(DbDirector, DbDirector.id == DbMovie.director_id)
+        .where(DbMovie.id == movie_id)
+    )
+
+
+# Only the public movie detail endpoint counts as a view, internal lookups
+# go through get_movie and stay read-only.
+def record_movie_view(
+    movie_id: int,
+    user_id: int,
+):
+    view_counter.record(
+        movie_id=movie_id,
+        user_id=user_id,
+    )
 
 
 # Maybe I should use a different type of update.
@@ -150,8 +319,11 @@ def patch_movie(
     if getattr(request, "actors", None) is not None:
         actors = db.query(DbActor).filter(DbActor.id.in_(request.actors)).all()
         movie.actors = actors
+    bump_version(movie)
     db.commit()
     db.refresh(movie)
+    invalidate_movie(movie.id)
+    suggest_index.add("movie", movie.id, movie.title)
     return movie
 
 
@@ -180,8 +352,11 @@ def update_movie(
         if key not in ["categories", "actors"]:
             setattr(movie, key, value)
 
+    bump_version(movie)
     db.commit()
     db.refresh(movie)
+    invalidate_movie(movie.id)
+    suggest_index.add("movie", movie.id, movie.title)
     return movie
 
 
@@ -194,6 +369,8 @@ def delete_movie(
         return False
     db.delete(movie)
     db.commit()
+    invalidate_movie(movie_id)
+    suggest_index.remove("movie", movie_id)
     return True
 
 
@@ -204,82 +381,319 @@ def get_movie_reviews(
     return db.query(DbReview).filter(DbReview.movie_id == movie_id).all()
 
 
-def get_movies_by_category(
-    category: int,
+def recompute_rating_aggregates(
     db: Session,
+    dry_run: bool = False,
 ):
-    movies = (
-        db.query(DbMovie)
-        .join(DbMovie.categories)
-        .filter(DbCategory.id == category.id)
+    """
+    Compares the stored rating aggregates of every movie against its
+    reviews and, unless dry_run is set, overwrites the drifted ones.
+    Returns the movies whose stored values were wrong.
+    """
+    actual = (
+        select(
+            DbReview.movie_id,
+            func.sum(DbReview.user_rating).label("rating_sum"),
+            func.count(DbReview.id).label("reviews_count"),
+        )
+        .group_by(DbReview.movie_id)
+        .subquery()
+    )
+    rows = (
+        db.query(
+            DbMovie.id,
+            DbMovie.rating_sum,
+            DbMovie.reviews_count,
+            coalesce(actual.c.rating_sum, 0),
+            coalesce(actual.c.reviews_count, 0),
+        )
+        .outerjoin(actual, actual.c.movie_id == DbMovie.id)
         .all()
     )
 
-    return movies
+    drifted = []
+    for movie_id, stored_sum, stored_count, rating_sum, reviews_count in rows:
+        if stored_count == reviews_count and math.isclose(
+            stored_sum or 0.0,
+            rating_sum,
+            abs_tol=1e-6,
+        ):
+            continue
+        drifted.append(
+            {
+                "id": movie_id,
+                "rating_sum": rating_sum,
+                "reviews_count": reviews_count,
+                "average_movie_rate": (
+                    rating_sum / reviews_count if reviews_count else 0.0
+                ),
+            }
+        )
 
+    if drifted and not dry_run:
+        db.execute(update(DbMovie), drifted)
+        db.execute(
+            update(DbMovie)
+            .where(DbMovie.id.in_([movie["id"] for movie in drifted]))
+            .values(version=coalesce(DbMovie.version, 0) + 1)
+        )
+        db.commit()
+        movie_cache.invalidate()
+    return drifted
 
-def calculate_average(
-    movie: DbMovie,
+
+def get_movie_categories(
     db: Session,
+    request: MovieBase,
 ):
-    average_rate = (
-        db.query(coalesce(func.avg(DbReview.user_rating), 0))
-        .filter(DbReview.movie_id == movie.id)
-        .scalar()
-    )
-    return average_rate
+    return db.query(DbCategory).filter(DbCategory.id.in_(request.categories)).all()
 
 
-def calculate_reviews(
+async def get_movie_extra(
     movie: DbMovie,
-    db: Session,
 ):
-    review_count = (
-        db.query(func.count(DbReview.id)).filter(DbReview.movie_id == movie.id).scalar()
+    if movie.imdb_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No imdb_id stored in the DB for this movie.",
+        )
+    return await get_extra_data(movie.imdb_id)
+
+
+# ========================== Async versions ==================================
+# Used by the async routes of the hot read paths, with an AsyncSession.
+async def movies_exist_async(
+    db: AsyncSession,
+    actor_id: int = None,
+    director_id: int = None,
+    category_id: int = None,
+):
+    statement = select(DbMovie.id).where(
+        *movie_filters(
+            actor_id=actor_id,
+            director_id=director_id,
+            category_id=category_id,
+        )
     )
-    return review_count
+    return await db.scalar(select(statement.exists()))
 
 
-def update_movie_poster_url(
-    db: Session,
-    movie: DbMovie,
-    file_path: str,
+async def get_all_movies_async(
+    db: AsyncSession,
+    actor_id: int = None,
+    director_id: int = None,
+    category_id: int = None,
+    top_movies: int = None,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
-    if movie:
-        movie.poster_url = file_path
-        db.commit()
-        db.refresh(movie)
-        return movie
+    statement = (
+        select(DbMovie)
+        .where(
+            *movie_filters(
+                actor_id=actor_id,
+                director_id=director_id,
+                category_id=category_id,
+            )
+        )
+        .options(*movie_listing_options())
+    )
+    if top_movies:
+        movies, _ = await paginate_async(
+            db=db,
+            statement=statement,
+            columns=TOP_MOVIES_COLUMNS,
+            limit=top_movies,
+            descending=True,
+        )
+        return movies, None
+    return await paginate_async(
+        db=db,
+        statement=statement,
+        columns=[DbMovie.id],
+        cursor=cursor,
+        limit=limit,
+    )
 
 
-def get_movie_categories(
-    db: Session,
-    request: MovieBase,
+async def search_movies_async(
+    db: AsyncSession,
+    query: str,
+    actor_id: int = None,
+    director_id: int = None,
+    category_id: int = None,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
-    return db.query(DbCategory).filter(DbCategory.id.in_(request.categories)).all()
+    """
+    Returns the active movies whose title or plot match the words of
+    `query`, best matches first by BM25 (title matches weigh more than plot
+    matches), together with the cursor of the next page.
+    """
+    match = match_expression(query)
+    if match is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The search query must contain at least one word.",
+        )
+    hits = (
+        select(
+            movies_fts.c.rowid.label("id"),
+            func.bm25(movies_fts.c.movies_fts, 10.0, 1.0).label("rank"),
+        )
+        .where(movies_fts.c.movies_fts.op("MATCH")(match))
+        .subquery()
+    )
+    statement = (
+        select(DbMovie, hits.c.rank, hits.c.id)
+        .join(hits, hits.c.id == DbMovie.id)
+        .where(
+            *movie_filters(
+                actor_id=actor_id,
+                director_id=director_id,
+                category_id=category_id,
+            )
+        )
+        .options(*movie_listing_options())
+    )
+    columns = [hits.c.rank, hits.c.id]
+    statement, limit = keyset_page(statement, columns, cursor, limit)
+    rows, next_cursor = next_page((await db.execute(statement)).all(), columns, limit)
+    return [row.DbMovie for row in rows], next_cursor
 
 
-def create_request_log(
-    db: Session,
+async def get_movie_async(
+    db: AsyncSession,
     movie_id: int,
-    user_id: int,
 ):
-    request = DbMovieRequest(
-        movie_id=movie_id,
-        user_id=int(user_id),
-        request_time=datetime.now(),
+    # Nothing can be lazy loaded on an AsyncSession, so load all the
+    # relationships serialized by MovieDisplayOne.
+    return await db.scalar(
+        select(DbMovie)
+        .options(
+            *movie_listing_options(),
+            selectinload(DbMovie.reviews),
+        )
+        .where(DbMovie.id == movie_id)
     )
 
-    db.add(request)
-    db.commit()
-    db.refresh(request)
-    return True
-
 
-def get_movie_extra(
+async def update_movie_poster_url_async(
+    db: AsyncSession,
     movie: DbMovie,
+    poster_url: str,
 ):
-    if movie.imdb_id is None:
-        return "No imdb_id stored in the DB for this movie."
+    movie.poster_url = poster_url
+    movie.poster_status = POSTER_PENDING if variants_available() else None
+    movie.poster_variants = None
+    bump_version(movie)
+    await db.commit()
+    invalidate_movie(movie.id)
+    # expire_on_commit is off, so the movie loaded by get_movie_async keeps
+    # its relationships and is serialized without any lazy load.
+    return movie
+
+
+async def get_movie_etag_async(
+    db: AsyncSession,
+    movie_id: int,
+):
+    versions = (await db.execute(movie_versions_statement(movie_id))).first()
+    return make_etag("movie", *versions) if versions else None
+
+
+async def get_movies_extra_async(
+    db: AsyncSession,
+    movie_ids: list,
+):
+    """
+    Returns the extra data of the given movies, with the imdb_ids resolved
+    in one query, as a tuple of the payloads and of the errors by movie id.
+    """
+    rows = await db.execute(
+        select(DbMovie.id, DbMovie.imdb_id).filter(DbMovie.id.in_(movie_ids))
+    )
+    imdb_ids = {movie_id: imdb_id for movie_id, imdb_id in rows}
+    payloads, errors = await get_extra_data_batch(
+        [imdb_id for imdb_id in imdb_ids.values() if imdb_id]
+    )
+    data, movie_errors = {}, {}
+    for movie_id in movie_ids:
+        imdb_id = imdb_ids.get(movie_id)
+        if movie_id not in imdb_ids:
+            movie_errors[movie_id] = f"Movie with Id: {movie_id} not found"
+        elif not imdb_id:
+            movie_errors[movie_id] = "No imdb_id stored in the DB for this movie."
+        elif imdb_id in payloads:
+            data[movie_id] = payloads[imdb_id]
+        else:
+            movie_errors[movie_id] = errors[imdb_id]
+    return data, movie_errors
+
+
+async def set_poster_variants_async(
+    movie_id: int,
+    poster_url: str,
+    poster_status: str,
+    poster_variants: dict = None,
+):
+    async with AsyncSessionLocal() as db:
+        # Skipped when another poster was uploaded in the meantime
+        await db.execute(
+            update(DbMovie)
+            .filter(DbMovie.id == movie_id, DbMovie.poster_url == poster_url)
+            .values(
+                poster_status=poster_status,
+                poster_variants=poster_variants,
+                version=coalesce(DbMovie.version, 0) + 1,
+            )
+        )
+        await db.commit()
+    invalidate_movie(movie_id)
+
+
+async def generate_poster_variants(
+    movie_id: int,
+    poster_url: str,
+):
+    try:
+        variants = await generate_variants_async(poster_url)
+    except Exception:
+        logger.exception("Generating the variants of %s failed", poster_url)
+        await set_poster_variants_async(movie_id, poster_url, POSTER_FAILED)
     else:
-        return get_movie_extra_data(movie.imdb_id)
+        await set_poster_variants_async(movie_id, poster_url, POSTER_READY, variants)
+
+
+def schedule_poster_variants(
+    movie_id: int,
+    poster_url: str,
+):
+    """
+    Generates the resized variants of a new poster in the background, when
+    Pillow is installed.
+    """
+    if variants_available():
+        task = asyncio.create_task(generate_poster_variants(movie_id, poster_url))
+        poster_tasks.add(task)
+        task.add_done_callback(poster_tasks.discard)
+
+
+async def resume_poster_variants():
+    """
+    Schedules again the variants left pending when the server stopped, or
+    marks them failed when Pillow is no longer installed.
+    """
+    async with AsyncSessionLocal() as db:
+        pending = (
+            await db.execute(
+                select(DbMovie.id, DbMovie.poster_url).filter(
+                    DbMovie.poster_status == POSTER_PENDING
+                )
+            )
+        ).all()
+    for movie_id, poster_url in pending:
+        if variants_available():
+            schedule_poster_variants(movie_id, poster_url)
+        else:
+            await set_poster_variants_async(movie_id, poster_url, POSTER_FAILED)
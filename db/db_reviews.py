@@ -1,39 +1,83 @@
+from sqlalchemy import case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.session import Session
+from sqlalchemy.sql.functions import coalesce
 from fastapi import HTTPException
-from db.models import DbReview
+from db.models import DbMovie, DbReview
+from db.pagination import DEFAULT_PAGE_SIZE, paginate, paginate_async
 from schemas.reviews_schemas import (
     CreateReview,
     ReviewUpdate,
 )
+from services.response_cache import movie_cache
 
 
 def get_review(review_id: int, db: Session):
     return db.query(DbReview).filter(DbReview.id == review_id).first()
 
 
-def get_all_reviews(
-    db: Session,
-    skip: int = 0,
+def review_filters(
+    user_id: int = None,
+    movie_id: int = None,
 ):
-    return db.query(DbReview).all()
+    criteria = []
+    if user_id is not None:
+        criteria.append(DbReview.user_id == user_id)
+    if movie_id is not None:
+        criteria.append(DbReview.movie_id == movie_id)
+    return criteria
 
 
-def create_review(
+def get_all_reviews(
     db: Session,
-    request: CreateReview,
-    user_id: int,
+    user_id: int = None,
+    movie_id: int = None,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
+    return paginate(
+        query=db.query(DbReview).filter(*review_filters(user_id, movie_id)),
+        columns=[DbReview.id],
+        cursor=cursor,
+        limit=limit,
+    )
 
-    new_review = DbReview(
-        review_content=request.review_content,
-        user_rating=request.user_rating,
-        movie_id=request.movie_id,
-        user_id=user_id,
+
+# Keeps the movie rating aggregates in step with its reviews. The change is
+# applied in SQL so concurrent reviews never overwrite each other, and it is
+# committed together with the review write by the caller.
+def rating_change_statement(
+    movie_id: int,
+    rating_delta: float,
+    count_delta: int,
+):
+    rating_sum = coalesce(DbMovie.rating_sum, 0) + rating_delta
+    reviews_count = coalesce(DbMovie.reviews_count, 0) + count_delta
+    return (
+        update(DbMovie)
+        .where(DbMovie.id == movie_id)
+        .values(
+            rating_sum=rating_sum,
+            reviews_count=reviews_count,
+            # The movie detail embeds its reviews
+            version=coalesce(DbMovie.version, 0) + 1,
+            average_movie_rate=case(
+                (reviews_count > 0, rating_sum / reviews_count),
+                else_=0.0,
+            ),
+        )
+        .execution_options(synchronize_session="fetch")
     )
-    db.add(new_review)
-    db.commit()
-    db.refresh(new_review)
-    return new_review
+
+
+def apply_rating_change(
+    db: Session,
+    movie_id: int,
+    rating_delta: float,
+    count_delta: int,
+):
+    db.execute(rating_change_statement(movie_id, rating_delta, count_delta))
 
 
 def update_review(
@@ -43,10 +87,34 @@ def update_review(
 ):
     review = get_review(db=db, review_id=review_id)
     if review:
+        old_movie_id, old_rating = review.movie_id, review.user_rating
         for key, value in review_data.dict(exclude_unset=True).items():
             setattr(review, key, value)
+        if (review.movie_id, review.user_rating) != (old_movie_id, old_rating):
+            apply_rating_change(
+                db=db,
+                movie_id=old_movie_id,
+                rating_delta=-old_rating,
+                count_delta=-1,
+            )
+            apply_rating_change(
+                db=db,
+                movie_id=review.movie_id,
+                rating_delta=review.user_rating,
+                count_delta=1,
+            )
+        else:
+            # Only the content changed, still a new version of the movie
+            apply_rating_change(
+                db=db,
+                movie_id=review.movie_id,
+                rating_delta=0,
+                count_delta=0,
+            )
         db.commit()
         db.refresh(review)
+        movie_cache.invalidate(old_movie_id)
+        movie_cache.invalidate(review.movie_id)
         return review
 
 
@@ -55,8 +123,15 @@ def delete_review(
     review_id: int,
 ):
     db_review = db.query(DbReview).filter(DbReview.id == review_id).first()
+    apply_rating_change(
+        db=db,
+        movie_id=db_review.movie_id,
+        rating_delta=-db_review.user_rating,
+        count_delta=-1,
+    )
     db.delete(db_review)
     db.commit()
+    movie_cache.invalidate(db_review.movie_id)
     return "Review deleted successfully"
 
 
@@ -74,3 +149,68 @@ def get_all_reviews_by_user(
         )
 
     return user_reviews
+
+
+# ========================== Async versions ==================================
+# The ReviewDisplayOne relationships are loaded up front, as nothing can be
+# lazy loaded on an AsyncSession.
+def review_display_options():
+    return (
+        selectinload(DbReview.movie),
+        selectinload(DbReview.user),
+    )
+
+
+async def get_all_reviews_async(
+    db: AsyncSession,
+    user_id: int = None,
+    movie_id: int = None,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    return await paginate_async(
+        db=db,
+        statement=select(DbReview)
+        .where(*review_filters(user_id, movie_id))
+        .options(*review_display_options()),
+        columns=[DbReview.id],
+        cursor=cursor,
+        limit=limit,
+    )
+
+
+async def reviews_exist_async(
+    db: AsyncSession,
+    user_id: int = None,
+    movie_id: int = None,
+):
+    statement = select(DbReview.id).where(*review_filters(user_id, movie_id))
+    return await db.scalar(select(statement.exists()))
+
+
+async def create_review_async(
+    db: AsyncSession,
+    request: CreateReview,
+    user_id: int,
+):
+    new_review = DbReview(
+        review_content=request.review_content,
+        user_rating=request.user_rating,
+        movie_id=request.movie_id,
+        user_id=user_id,
+    )
+    db.add(new_review)
+    await db.execute(
+        rating_change_statement(
+            movie_id=request.movie_id,
+            rating_delta=request.user_rating,
+            count_delta=1,
+        )
+    )
+    await db.commit()
+    movie_cache.invalidate(new_review.movie_id)
+    return await db.scalar(
+        select(DbReview)
+        .options(*review_display_options())
+        .where(DbReview.id == new_review.id)
+    )
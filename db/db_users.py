@@ -1,10 +1,14 @@
-from sqlalchemy import func
-from sqlalchemy.orm import joinedload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.orm.session import Session
 
+from db.db_reviews import apply_rating_change
 from db.hash import Hash
 from db.models import DbReview, DbUser
+from db.pagination import DEFAULT_PAGE_SIZE, paginate_async
 from schemas.users_schemas import UserBase, UserTypeUpdate, UserUpdate
+from services.response_cache import movie_cache
 
 
 # TODO: check if i am passing user/reviews objects and not just ids
@@ -24,17 +28,6 @@ def create_user(
     return new_user
 
 
-def get_all_users(db: Session):
-    users = db.query(DbUser).all()
-    for user in users:
-        user.review_count = (
-            db.query(func.count(DbReview.id))
-            .filter(DbReview.user_id == user.id)
-            .scalar()
-        )
-    return users
-
-
 def get_user(
     db: Session,
     id: int = None,
@@ -78,11 +71,64 @@ def update_user_type(
 
 
 def delete_user(db: Session, user: DbUser):
+    # The user's reviews are removed by the cascade, so take them out of the
+    # movie rating aggregates in the same transaction.
+    user_ratings = (
+        db.query(
+            DbReview.movie_id,
+            func.sum(DbReview.user_rating),
+            func.count(DbReview.id),
+        )
+        .filter(DbReview.user_id == user.id)
+        .group_by(DbReview.movie_id)
+        .all()
+    )
+    for movie_id, rating_sum, reviews_count in user_ratings:
+        apply_rating_change(
+            db=db,
+            movie_id=movie_id,
+            rating_delta=-rating_sum,
+            count_delta=-reviews_count,
+        )
     db.delete(user)
     db.commit()
+    for movie_id, _, _ in user_ratings:
+        movie_cache.invalidate(movie_id)
     return user
 
 
 # Get All Users with Reviews
 def get_all_users_with_reviews(db: Session):
     return db.query(DbUser).options(joinedload(DbUser.reviews)).all()
+
+
+# ========================== Async versions ==================================
+async def get_user_async(
+    db: AsyncSession,
+    id: int = None,
+    email: str = None,
+):
+    statement = select(DbUser).options(selectinload(DbUser.reviews))
+    if id is not None:
+        return await db.scalar(statement.where(DbUser.id == id))
+    elif email is not None:
+        return await db.scalar(statement.where(DbUser.email == email))
+    else:
+        return None
+
+
+async def get_all_users_async(
+    db: AsyncSession,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    users, next_cursor = await paginate_async(
+        db=db,
+        statement=select(DbUser).options(selectinload(DbUser.reviews)),
+        columns=[DbUser.id],
+        cursor=cursor,
+        limit=limit,
+    )
+    for user in users:
+        user.review_count = len(user.reviews)
+    return users, next_cursor
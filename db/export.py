@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from db.database import SessionLocal
+from db.models import (
+    DbActor,
+    DbCategory,
+    DbDirector,
+    DbMovie,
+    DbMovieActor,
+    DbReview,
+    DbUser,
+    movie_categories,
+)
+
+# Rows loaded from the database at a time, so the memory used does not
+# depend on the size of the exported table
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+# Separator of the list values (actors, categories) in the CSV export
+CSV_LIST_SEPARATOR = "|"
+
+# Plain column selects: building ORM objects would cost more than the export
+MOVIES_STATEMENT = (
+    select(
+        DbMovie.id,
+        DbMovie.title,
+        DbMovie.released_date,
+        DbMovie.plot,
+        DbMovie.imdb_id,
+        DbMovie.poster_url,
+        DbMovie.director_id,
+        DbDirector.director_name.label("director"),
+        DbMovie.average_movie_rate,
+        DbMovie.reviews_count,
+        DbMovie.requests_count,
+        DbMovie.movie_active,
+    )
+    .outerjoin(DbDirector, DbMovie.director_id == DbDirector.id)
+    .order_by(DbMovie.id)
+)
+REVIEWS_STATEMENT = select(
+    DbReview.id,
+    DbReview.movie_id,
+    DbReview.user_id,
+    DbReview.user_rating,
+    DbReview.review_content,
+    DbReview.created_at,
+    DbReview.review_active,
+).order_by(DbReview.id)
+# The password hash is never exported
+USERS_STATEMENT = select(
+    DbUser.id,
+    DbUser.username,
+    DbUser.email,
+    DbUser.user_type,
+    DbUser.created_at,
+    DbUser.user_active,
+).order_by(DbUser.id)
+
+
+def names_by_movie(
+    db: Session,
+    statement,
+):
+    names = defaultdict(list)
+    for movie_id, name in db.execute(statement):
+        names[movie_id].append(name)
+    return names
+
+
+def add_movie_links(
+    db: Session,
+    movies: list,
+):
+    """Adds the actor and category names to a batch of movie rows."""
+    movie_ids = [movie["id"] for movie in movies]
+    actors = names_by_movie(
+        db,
+        select(DbMovieActor.movie_id, DbActor.actor_name)
+        .join(DbActor, DbMovieActor.actor_id == DbActor.id)
+        .filter(DbMovieActor.movie_id.in_(movie_ids)),
+    )
+    categories = names_by_movie(
+        db,
+        select(movie_categories.c.movie_id, DbCategory.category_name)
+        .join(DbCategory, movie_categories.c.category_id == DbCategory.id)
+        .filter(movie_categories.c.movie_id.in_(movie_ids)),
+    )
+    for movie in movies:
+        movie["actors"] = actors[movie["id"]]
+        movie["categories"] = categories[movie["id"]]
+    return movies
+
+
+# Statement, function completing a batch of rows and the fields it adds
+EXPORTS = {
+    "movies": (MOVIES_STATEMENT, add_movie_links, ["actors", "categories"]),
+    "reviews": (REVIEWS_STATEMENT, None, []),
+    "users": (USERS_STATEMENT, None, []),
+}
+
+
+def export_fields(kind: str):
+    """Returns the field names of the rows of one kind, in order."""
+    statement, _, added_fields = EXPORTS[kind]
+    return [*statement.selected_columns.keys(), *added_fields]
+
+
+def iter_rows(kind: str):
+    """
+    Yields the rows of one kind of the catalog as dictionaries, read with a
+    server-side cursor in batches. The session is opened by the generator
+    itself, so it stays open while a streaming response is being sent.
+    """
+    statement, complete, _ = EXPORTS[kind]
+    with SessionLocal() as db:
+        result = db.execute(
+            statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ).mappings()
+        for partition in result.partitions():
+            rows = [dict(row) for row in partition]
+            if complete is not None:
+                rows = complete(db, rows)
+            yield from rows
+
+
+def json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def csv_value(value):
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(value)
+    return json_value(value)
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, default=json_value) + "\n"
+
+
+def iter_csv(
+    rows,
+    fieldnames: list,
+):
+    """Yields the header line, then the rows, so an empty table has one."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow({key: csv_value(value) for key, value in row.items()})
+        yield buffer.getvalue()
+
+
+def iter_export(
+    kind: str,
+    export_format: str = "ndjson",
+):
+    """Yields the lines of the export of one kind in the given format."""
+    rows = iter_rows(kind)
+    if export_format == "csv":
+        return iter_csv(rows, export_fields(kind))
+    return iter_ndjson(rows)
@@ -0,0 +1,71 @@
+from sqlalchemy import Engine, bindparam, inspect, select, update
+from db.database import Base
+from db.models import DbMovie
+from db.search import title_key
+
+
+def add_column_statement(
+    engine: Engine,
+    table,
+    column,
+):
+    statement = (
+        f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+        f"{column.type.compile(dialect=engine.dialect)}"
+    )
+    # Existing rows get the value a new row would have
+    if column.default is not None and column.default.is_scalar:
+        statement += f" DEFAULT {column.default.arg!r}"
+    return statement
+
+
+def fill_title_keys(connection):
+    movies = DbMovie.__table__
+    rows = [
+        {"b_id": movie_id, "b_title_key": title_key(title)}
+        for movie_id, title in connection.execute(select(movies.c.id, movies.c.title))
+    ]
+    if rows:
+        connection.execute(
+            update(movies)
+            .where(movies.c.id == bindparam("b_id"))
+            .values(title_key=bindparam("b_title_key")),
+            rows,
+        )
+
+
+# Columns computed from the others, filled once added
+BACKFILLS = {
+    "movies.title_key": fill_title_keys,
+}
+
+
+def upgrade_schema(engine: Engine):
+    """
+    Brings a database created by an older version up to the models: adds
+    the missing columns of the existing tables, filling in the computed
+    ones, and the missing indexes. create_all only creates the missing
+    tables.
+
+    Returns:
+    - The added columns, as "table.column".
+    """
+    inspector = inspect(engine)
+    added = set()
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    connection.exec_driver_sql(
+                        add_column_statement(engine, table, column)
+                    )
+                    added.add(f"{table.name}.{column.name}")
+                    backfill = BACKFILLS.get(f"{table.name}.{column.name}")
+                    if backfill is not None:
+                        backfill(connection)
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    return added
@@ -2,11 +2,13 @@ from datetime import datetime
 from sqlalchemy import (
     Column,
     ForeignKey,
+    Index,
     Integer,
+    JSON,
     Table,
     Text,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql.sqltypes import (
     DateTime,
     Float,
@@ -14,6 +16,7 @@ from sqlalchemy.sql.sqltypes import (
     Boolean,
 )
 from db.database import Base
+from db import search
 
 
 class DbUser(Base):
@@ -55,6 +58,11 @@ class DbUser(Base):
 
 class DbMovie(Base):
     __tablename__ = "movies"
+    __table_args__ = (
+        Index("ix_movies_director_id_id", "director_id", "id"),
+        # Top rated movies ranking
+        Index("ix_movies_rating_rank", "average_movie_rate", "id"),
+    )
     id = Column(
         Integer,
         unique=True,
@@ -62,6 +70,11 @@ class DbMovie(Base):
         index=True,
     )
     title = Column(String)
+    # Normalized title, see db.search.title_key, to find the duplicates
+    title_key = Column(
+        String,
+        index=True,
+    )
     released_date = Column(DateTime)
     categories = relationship(
         "DbCategory",
@@ -88,10 +101,22 @@ class DbMovie(Base):
     )
     plot = Column(String)
     poster_url = Column(String)
+    # Resized copies of the poster, generated in the background after upload
+    poster_status = Column(String)
+    poster_variants = Column(JSON)
     average_movie_rate = Column(
         Float,
         default=0.0,
     )
+    # Kept up to date by the review write functions, see db_reviews.
+    rating_sum = Column(
+        Float,
+        default=0.0,
+    )
+    reviews_count = Column(
+        Integer,
+        default=0,
+    )
     imdb_id = Column(String)
     requests_count = Column(
         Integer,
@@ -105,6 +130,16 @@ class DbMovie(Base):
         Boolean,
         default=True,
     )
+    # Bumped on every change of the movie, used for the ETags
+    version = Column(
+        Integer,
+        default=1,
+    )
+
+    @validates("title")
+    def set_title_key(self, key, title):
+        self.title_key = search.title_key(title)
+        return title
 
 
 class DbActor(Base):
@@ -129,10 +164,19 @@ class DbActor(Base):
         Boolean,
         default=True,
     )
+    version = Column(
+        Integer,
+        default=1,
+    )
 
 
 class DbReview(Base):
     __tablename__ = "reviews"
+    # Keyset pagination of the reviews filtered by user or movie
+    __table_args__ = (
+        Index("ix_reviews_user_id_id", "user_id", "id"),
+        Index("ix_reviews_movie_id_id", "movie_id", "id"),
+    )
     id = Column(
         Integer,
         primary_key=True,
@@ -198,10 +242,15 @@ class DbDirector(Base):
         Boolean,
         default=True,
     )
+    version = Column(
+        Integer,
+        default=1,
+    )
 
 
 class DbMovieActor(Base):
     __tablename__ = "movie_actors"
+    __table_args__ = (Index("ix_movie_actors_actor_id", "actor_id", "movie_id"),)
     movie_id = Column(
         Integer,
         ForeignKey(
@@ -241,6 +290,10 @@ class DbCategory(Base):
         Boolean,
         default=True,
     )
+    version = Column(
+        Integer,
+        default=1,
+    )
 
 
 class DbMovieRequest(Base):
@@ -269,6 +322,37 @@ class DbMovieRequest(Base):
     )
 
 
+class DbChangeCounter(Base):
+    """Number of changes of a table, only ever increases. See db.changes."""
+
+    __tablename__ = "change_counters"
+    name = Column(
+        String,
+        primary_key=True,
+    )
+    value = Column(
+        Integer,
+        default=0,
+    )
+
+
+class DbMovieExtraData(Base):
+    """Last response of the external movie database, by IMDb id."""
+
+    __tablename__ = "movie_extra_data"
+    imdb_id = Column(
+        String,
+        primary_key=True,
+    )
+    payload = Column(JSON)
+    fetched_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+    )
+    # Seconds after fetched_at during which the payload is served as is
+    ttl = Column(Integer)
+
+
 """Special many <--> many relations tables"""
 movie_categories = Table(
     "movie_categories",
@@ -283,4 +367,5 @@ movie_categories = Table(
         Integer,
         ForeignKey("categories.id"),
     ),
+    Index("ix_movie_categories_category_id", "category_id", "movie_id"),
 )
@@ -0,0 +1,126 @@
+import base64
+import binascii
+import json
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: list):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(
+    cursor: str,
+    size: int,
+):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor.",
+        )
+    return values
+
+
+def keyset_after(
+    columns: list,
+    values: list,
+    descending: bool = False,
+):
+    """
+    Builds the WHERE clause selecting the rows that come after `values`
+    in the (columns) ordering, e.g. (a > x) OR (a = x AND b > y).
+    """
+    column, value = columns[0], values[0]
+    after = column < value if descending else column > value
+    if len(columns) == 1:
+        return after
+    return or_(
+        after,
+        and_(
+            column == value,
+            keyset_after(columns[1:], values[1:], descending),
+        ),
+    )
+
+
+def keyset_page(
+    query,
+    columns: list,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+):
+    """
+    Restricts a Query or a select() statement to the page following the
+    cursor, ordered on `columns`, whose last entry must be the unique id
+    breaking the ties. One extra row is requested to detect a next page.
+    """
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    if cursor:
+        values = decode_cursor(cursor=cursor, size=len(columns))
+        query = query.filter(keyset_after(columns, values, descending))
+    query = query.order_by(
+        *[column.desc() if descending else column.asc() for column in columns]
+    ).limit(limit + 1)
+    return query, limit
+
+
+def next_page(
+    rows: list,
+    columns: list,
+    limit: int,
+):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            [getattr(rows[-1], column.key) for column in columns]
+        )
+    return rows, next_cursor
+
+
+def paginate(
+    query: Query,
+    columns: list,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+):
+    """
+    Returns one page of the query using keyset pagination over `columns`,
+    together with the opaque cursor of the next page (None on the last page).
+    """
+    query, limit = keyset_page(query, columns, cursor, limit, descending)
+    return next_page(query.all(), columns, limit)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    statement: Select,
+    columns: list,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+):
+    """Same as paginate, for a select() statement run on an AsyncSession."""
+    statement, limit = keyset_page(statement, columns, cursor, limit, descending)
+    rows = (await db.scalars(statement)).all()
+    return next_page(list(rows), columns, limit)
+
+
+def set_next_cursor(
+    response: Response,
+    next_cursor: str,
+):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,73 @@
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetricsMixin:
+    """
+    Counts the checkouts of a QueuePool, the time spent waiting for a
+    connection, the connections opened beyond pool_size (overflow events)
+    and the checkouts that timed out because the pool was exhausted.
+
+    The wait of a checkout lasts until the connection is handed out, so it
+    includes opening a new connection when the pool has none idle. The
+    overflow events are read from the public overflow() around each
+    checkout, concurrent checkouts can share one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._max_overflow_setting = kwargs.get("max_overflow", 10)
+        self._metrics_lock = threading.Lock()
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._overflow_events = 0
+        self._timeouts = 0
+
+    def connect(self):
+        started = time.perf_counter()
+        overflow = self.overflow()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            # overflow() counts up from -pool_size, only positive values are
+            # connections opened beyond the size of the pool
+            opened = self.overflow() > max(overflow, 0)
+            with self._metrics_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._overflow_events += int(opened)
+
+    def stats(self):
+        with self._metrics_lock:
+            return {
+                "size": self.size(),
+                "checked_out": self.checkedout(),
+                "overflow": max(self.overflow(), 0),
+                "max_overflow": self._max_overflow_setting,
+                "checkouts": self._checkouts,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+                "wait_seconds_avg": round(
+                    self._wait_total / self._checkouts if self._checkouts else 0.0,
+                    6,
+                ),
+                "overflow_events": self._overflow_events,
+                "timeouts": self._timeouts,
+            }
+
+
+class MonitoredQueuePool(PoolMetricsMixin, QueuePool):
+    pass
+
+
+class MonitoredAsyncQueuePool(PoolMetricsMixin, AsyncAdaptedQueuePool):
+    pass
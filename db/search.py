@@ -0,0 +1,99 @@
+import re
+import unicodedata
+from sqlalchemy import Engine, column, table, text
+
+# Full-text index over the titles and plots of the movies. It is an external
+# content FTS5 table: it stores only the index and reads the text from the
+# movies table. The triggers keep it in step with every write, including the
+# bulk imports done in SQL.
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+        title,
+        plot,
+        content='movies',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_fts(rowid, title, plot)
+        VALUES (new.id, new.title, new.plot);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title, plot)
+        VALUES ('delete', old.id, old.title, old.plot);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_update
+    AFTER UPDATE OF title, plot ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title, plot)
+        VALUES ('delete', old.id, old.title, old.plot);
+        INSERT INTO movies_fts(rowid, title, plot)
+        VALUES (new.id, new.title, new.plot);
+    END
+    """,
+]
+
+movies_fts = table("movies_fts", column("rowid"), column("movies_fts"))
+
+SEARCH_TOKEN = re.compile(r"\w+")
+# Shorter last words are matched exactly: a one or two letter prefix would
+# match most of the catalog and rank it all
+MIN_PREFIX_LENGTH = 3
+
+
+def normalize(text: str):
+    """Lower cases a name and strips its accents, as the search index does."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def title_key(title: str):
+    """
+    Returns the title reduced to its words, lower cased and without accents:
+    two titles with the same key are the same title.
+    """
+    return " ".join(SEARCH_TOKEN.findall(normalize(title or "")))
+
+
+def create_search_index(engine: Engine):
+    """
+    Creates the movies_fts table and its triggers on SQLite. A new index is
+    filled with the movies already stored.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'movies_fts'")
+        ).first()
+        for statement in SEARCH_INDEX_DDL:
+            connection.exec_driver_sql(statement)
+        if not exists:
+            connection.exec_driver_sql(
+                "INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')"
+            )
+
+
+def match_expression(query: str):
+    """
+    Turns the text typed by a user into an FTS5 query matching all its
+    words, the last one as a prefix (from MIN_PREFIX_LENGTH letters) so
+    results show up while typing. The words are quoted, so FTS5 operators
+    in the text are not interpreted.
+
+    Returns:
+    - The FTS5 query, or None when the text contains no word.
+    """
+    words = SEARCH_TOKEN.findall(query)
+    if not words:
+        return None
+    match = " ".join(f'"{word}"' for word in words)
+    return match + "*" if len(words[-1]) >= MIN_PREFIX_LENGTH else match
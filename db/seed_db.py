@@ -4,7 +4,10 @@ from .database import (
     SessionLocal,
     Base,
 )
+from .changes import seed_change_counters
+from .migrations import upgrade_schema
 from .models import DbCategory
+from .search import create_search_index
 from schemas.categories_schemas import MovieCategoryType
 
 
@@ -24,8 +27,18 @@ def seed_categories(session: Session):
 def create_tables_and_seed():
     Base.metadata.create_all(bind=engine)  # Create database tables
 
+    added_columns = upgrade_schema(engine)  # Columns added since the database was created
+
+    create_search_index(engine)  # Full-text index of the movies
+
     with SessionLocal() as session:
         seed_categories(session)  # Seed the categories table
+        seed_change_counters(session)  # Counters behind the ETags
+        if "movies.rating_sum" in added_columns:
+            # Older databases have no stored rating aggregates yet
+            from .db_movies import recompute_rating_aggregates
+
+            recompute_rating_aggregates(db=session)
 
 
 # Remember to call create_tables_and_seed() appropriate place
@@ -0,0 +1,508 @@
+import heapq
+import logging
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from sqlalchemy import func, select
+from sqlalchemy.sql.functions import coalesce
+from config import CACHE_MAX_ENTRIES
+from db.database import SessionLocal
+from db.models import DbActor, DbDirector, DbMovie, DbMovieActor
+from db.search import MIN_PREFIX_LENGTH, SEARCH_TOKEN, normalize
+
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+# The kind of a name is stored in the two low bits of its key
+SUGGESTION_KINDS = ("movie", "actor", "director")
+KIND_BITS = 2
+KIND_MASK = (1 << KIND_BITS) - 1
+# Least trigram similarity of a fuzzy match, as the pg_trgm default
+SIMILARITY_THRESHOLD = 0.3
+# Closest words of the index looked up for each word of a fuzzy query,
+# names counted through their postings at most, and names then compared
+# with the query for each result asked
+WORD_VARIANTS = 5
+SCAN_BUDGET = 20000
+CANDIDATES_PER_RESULT = 10
+# Movies read from the database at a time when the index is loaded
+LOAD_BATCH_SIZE = 10000
+
+logger = logging.getLogger(__name__)
+
+
+def name_words(name: str):
+    return set(SEARCH_TOKEN.findall(normalize(name or "")))
+
+
+def word_trigrams(word: str):
+    """
+    Returns the trigrams of a word padded with two spaces before and one
+    after, as pg_trgm does.
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def name_trigrams(words):
+    trigrams = set()
+    for word in words:
+        trigrams |= word_trigrams(word)
+    return trigrams
+
+
+def similarity(
+    trigrams: set,
+    other_trigrams: set,
+):
+    shared = len(trigrams & other_trigrams)
+    return shared / (len(trigrams) + len(other_trigrams) - shared)
+
+
+def make_key(
+    kind: str,
+    entry_id: int,
+):
+    return entry_id << KIND_BITS | SUGGESTION_KINDS.index(kind)
+
+
+class SuggestIndex:
+    """
+    In-memory prefix index of the movie titles and of the actor and director
+    names, for type-ahead. The distinct words of the names are kept sorted,
+    so the words starting with a prefix are found with a binary search, and
+    each word points to the keys of the names containing it.
+
+    The movies are ranked by their requests_count, kept up to date by the
+    view counter. Actors and directors are ranked by the views of their
+    movies, computed when the index is loaded.
+
+    A one or two letter prefix matches a large part of the catalog, so its
+    ranking is cached until a name or a popularity changes.
+
+    The trigrams of the distinct words are indexed as well, for the lookups
+    tolerating typos: each word of the query is matched to the closest
+    words of the index, and the names containing them are compared with the
+    query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}
+        self._popularity = {}
+        self._postings = {}
+        # (word, kind index) -> the keys of that kind only, so the lookups of
+        # a single kind do not spend their budget on the other kinds
+        self._kind_postings = {}
+        self._words = []
+        # trigram -> the words of the index containing it, and the number of
+        # trigrams of each word
+        self._trigrams = {}
+        self._trigram_counts = {}
+        # (prefix, kind) -> the MAX_SUGGESTIONS best keys
+        self._short_prefixes = {}
+        self.loaded = False
+        # Changes made while the index is reloaded, replayed on the new one
+        self._journal = None
+        # Background reloads, see reload
+        self._reloading = False
+        self._reload_pending = False
+
+    def add(
+        self,
+        kind: str,
+        entry_id: int,
+        name: str,
+        popularity: float = None,
+    ):
+        """
+        Adds a name to the index or replaces it. The popularity of a name
+        already indexed is kept unless given.
+        """
+        key = make_key(kind, entry_id)
+        with self._lock:
+            self._add(key, name, popularity)
+            if self._journal is not None:
+                self._journal.append((key, name, popularity))
+
+    def remove(
+        self,
+        kind: str,
+        entry_id: int,
+    ):
+        key = make_key(kind, entry_id)
+        with self._lock:
+            self._remove(key)
+            if self._journal is not None:
+                self._journal.append((key, None, None))
+
+    def add_popularity(
+        self,
+        kind: str,
+        entry_id: int,
+        amount: float,
+    ):
+        key = make_key(kind, entry_id)
+        with self._lock:
+            if key in self._popularity:
+                self._popularity[key] += amount
+                self._short_prefixes.clear()
+
+    def _add(
+        self,
+        key: int,
+        name: str,
+        popularity: float,
+    ):
+        self._short_prefixes.clear()
+        if key in self._names:
+            if popularity is None:
+                popularity = self._popularity[key]
+            self._remove(key)
+        words = name_words(name)
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = array("q")
+                insort(self._words, word)
+                self._index_trigrams(word)
+            postings.append(key)
+            kind_key = (word, key & KIND_MASK)
+            if kind_key not in self._kind_postings:
+                self._kind_postings[kind_key] = array("q")
+            self._kind_postings[kind_key].append(key)
+        self._names[key] = name
+        self._popularity[key] = popularity or 0
+
+    def _remove(
+        self,
+        key: int,
+    ):
+        name = self._names.pop(key, None)
+        if name is None:
+            return
+        self._short_prefixes.clear()
+        del self._popularity[key]
+        words = name_words(name)
+        for word in words:
+            kind_postings = self._kind_postings[(word, key & KIND_MASK)]
+            kind_postings.remove(key)
+            if not kind_postings:
+                del self._kind_postings[(word, key & KIND_MASK)]
+            postings = self._postings[word]
+            postings.remove(key)
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+                self._unindex_trigrams(word)
+
+    def _index_trigrams(
+        self,
+        word: str,
+    ):
+        trigrams = word_trigrams(word)
+        for trigram in trigrams:
+            self._trigrams.setdefault(trigram, set()).add(word)
+        self._trigram_counts[word] = len(trigrams)
+
+    def _unindex_trigrams(
+        self,
+        word: str,
+    ):
+        del self._trigram_counts[word]
+        for trigram in word_trigrams(word):
+            words = self._trigrams[trigram]
+            words.discard(word)
+            if not words:
+                del self._trigrams[trigram]
+
+    def _prefix_matches(
+        self,
+        prefix: str,
+    ):
+        """Returns the keys of the names with a word starting with prefix."""
+        start = bisect_left(self._words, prefix)
+        end = bisect_left(self._words, prefix + "\U0010ffff", start)
+        return set().union(
+            *(self._postings[word] for word in self._words[start:end])
+        )
+
+    def _rank(
+        self,
+        complete: list,
+        prefix: str,
+        kind: str,
+        limit: int,
+    ):
+        postings = sorted(
+            (self._postings.get(word, ()) for word in set(complete)),
+            key=len,
+        )
+        if postings:
+            candidates = set(postings[0]).intersection(*postings[1:])
+            candidates &= self._prefix_matches(prefix)
+        else:
+            candidates = self._prefix_matches(prefix)
+        if kind is not None:
+            kind_index = SUGGESTION_KINDS.index(kind)
+            candidates = [key for key in candidates if key & KIND_MASK == kind_index]
+        best = heapq.nlargest(limit, candidates, key=self._popularity.__getitem__)
+        # Equally popular names: the shortest, closest to the query, first
+        best.sort(key=lambda key: (-self._popularity[key], len(self._names[key])))
+        return best
+
+    def suggest(
+        self,
+        query: str,
+        kind: str = None,
+        limit: int = DEFAULT_SUGGESTIONS,
+    ):
+        """
+        Finds the names containing all the words of the query, the last one
+        as a prefix, like the full-text search.
+
+        Returns:
+        - Up to `limit` (kind, id, name) tuples, the most popular first.
+        """
+        words = SEARCH_TOKEN.findall(normalize(query))
+        if not words:
+            return []
+        *complete, prefix = words
+        with self._lock:
+            if complete or len(prefix) >= MIN_PREFIX_LENGTH:
+                best = self._rank(complete, prefix, kind, limit)
+            else:
+                best = self._short_prefixes.get((prefix, kind))
+                if best is None:
+                    if len(self._short_prefixes) >= CACHE_MAX_ENTRIES:
+                        self._short_prefixes.clear()
+                    best = self._rank(complete, prefix, kind, MAX_SUGGESTIONS)
+                    self._short_prefixes[(prefix, kind)] = best
+                best = best[:limit]
+            return [
+                (
+                    SUGGESTION_KINDS[key & KIND_MASK],
+                    key >> KIND_BITS,
+                    self._names[key],
+                )
+                for key in best
+            ]
+
+    def _similar_words(
+        self,
+        word: str,
+        threshold: float,
+    ):
+        """Returns the WORD_VARIANTS words of the index closest to a word."""
+        trigrams = word_trigrams(word)
+        counts = Counter()
+        for trigram in trigrams:
+            counts.update(self._trigrams.get(trigram, ()))
+        # No more similar than the share of the trigrams of the word found
+        needed = threshold * len(trigrams)
+        candidates = [item for item in counts.items() if item[1] >= needed]
+        variants = []
+        for other, shared in candidates:
+            score = shared / (len(trigrams) + self._trigram_counts[other] - shared)
+            if score >= threshold:
+                variants.append((score, other))
+        return [other for _, other in heapq.nlargest(WORD_VARIANTS, variants)]
+
+    def _similar(
+        self,
+        query: str,
+        kind: str,
+        limit: int,
+        threshold: float,
+    ):
+        """
+        Returns the (similarity, key) of the `limit` names most similar to
+        the query, from `threshold` on.
+
+        The names of the kind containing the closest words to those of the
+        query are counted, the rarest words first and up to SCAN_BUDGET
+        postings: the common words (such as "the") would cost the most and
+        tell the least. The names with the most words found are then
+        compared one by one.
+        """
+        words = set(SEARCH_TOKEN.findall(normalize(query)))
+        if not words:
+            return []
+        kind_index = None if kind is None else SUGGESTION_KINDS.index(kind)
+        expansions = []
+        for word in words:
+            postings = [
+                self._postings[other]
+                if kind_index is None
+                else self._kind_postings.get((other, kind_index), ())
+                for other in self._similar_words(word, threshold)
+            ]
+            expansions.append((sum(map(len, postings)), postings))
+        counts = Counter()
+        budget = SCAN_BUDGET
+        for _, postings in sorted(expansions, key=lambda expansion: expansion[0]):
+            for keys in postings:
+                if budget <= 0:
+                    break
+                counts.update(keys if len(keys) <= budget else keys[:budget])
+                budget -= len(keys)
+        trigrams = name_trigrams(words)
+        best = []
+        for key, _ in counts.most_common(limit * CANDIDATES_PER_RESULT):
+            score = similarity(
+                trigrams, name_trigrams(name_words(self._names[key]))
+            )
+            if score >= threshold:
+                best.append((score, key))
+        best.sort(key=lambda match: (-match[0], -self._popularity[match[1]]))
+        return best[:limit]
+
+    def similar(
+        self,
+        query: str,
+        kind: str = None,
+        limit: int = DEFAULT_SUGGESTIONS,
+        threshold: float = SIMILARITY_THRESHOLD,
+    ):
+        """
+        Finds the names most similar to the query, tolerating typos. The
+        similarity is the share of trigrams the names and the query have in
+        common, between 0 and 1.
+
+        Returns:
+        - Up to `limit` (kind, id, name, similarity) tuples, the most
+          similar first.
+        """
+        with self._lock:
+            return [
+                (
+                    SUGGESTION_KINDS[key & KIND_MASK],
+                    key >> KIND_BITS,
+                    self._names[key],
+                    score,
+                )
+                for score, key in self._similar(query, kind, limit, threshold)
+            ]
+
+    def load(self):
+        """
+        Builds the index from the database, then swaps it in: suggestions
+        are served from the previous index meanwhile, and the writes made in
+        between are replayed on the new one.
+        """
+        with self._lock:
+            self._journal = []
+        try:
+            with SessionLocal() as db:
+                actors = db.execute(
+                    select(
+                        DbActor.id,
+                        DbActor.actor_name,
+                        func.sum(coalesce(DbMovie.requests_count, 0)),
+                    )
+                    .outerjoin(DbMovieActor, DbMovieActor.actor_id == DbActor.id)
+                    .outerjoin(DbMovie, DbMovie.id == DbMovieActor.movie_id)
+                    .group_by(DbActor.id)
+                ).all()
+                directors = db.execute(
+                    select(
+                        DbDirector.id,
+                        DbDirector.director_name,
+                        func.sum(coalesce(DbMovie.requests_count, 0)),
+                    )
+                    .outerjoin(DbMovie, DbMovie.director_id == DbDirector.id)
+                    .group_by(DbDirector.id)
+                ).all()
+                movies = db.execute(
+                    select(
+                        DbMovie.id,
+                        DbMovie.title,
+                        coalesce(DbMovie.requests_count, 0),
+                    )
+                    .filter(DbMovie.movie_active)
+                    .execution_options(yield_per=LOAD_BATCH_SIZE)
+                )
+                index = SuggestIndex()
+                for kind, rows in (
+                    ("movie", movies),
+                    ("actor", actors),
+                    ("director", directors),
+                ):
+                    kind_index = SUGGESTION_KINDS.index(kind)
+                    for entry_id, name, popularity in rows:
+                        key = entry_id << KIND_BITS | kind_index
+                        words = name_words(name)
+                        for word in words:
+                            postings = index._postings.get(word)
+                            if postings is None:
+                                postings = index._postings[word] = array("q")
+                            postings.append(key)
+                            kind_key = (word, kind_index)
+                            postings = index._kind_postings.get(kind_key)
+                            if postings is None:
+                                postings = index._kind_postings[kind_key] = array("q")
+                            postings.append(key)
+                        index._names[key] = name
+                        index._popularity[key] = popularity or 0
+            index._words = sorted(index._postings)
+            for word in index._words:
+                index._index_trigrams(word)
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            self._names = index._names
+            self._popularity = index._popularity
+            self._postings = index._postings
+            self._kind_postings = index._kind_postings
+            self._words = index._words
+            self._trigrams = index._trigrams
+            self._trigram_counts = index._trigram_counts
+            self._short_prefixes.clear()
+            self.loaded = True
+            for key, name, popularity in self._journal:
+                if name is None:
+                    self._remove(key)
+                else:
+                    self._add(key, name, popularity)
+            self._journal = None
+
+    def reload(self):
+        """
+        Reloads the index in a background thread, without waiting for it.
+        The reloads asked while one runs are done once, after it.
+        """
+        with self._lock:
+            self._reload_pending = True
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(
+            target=self._reload_loop,
+            name="suggest-index-reload",
+            daemon=True,
+        ).start()
+
+    def _reload_loop(self):
+        while True:
+            with self._lock:
+                if not self._reload_pending:
+                    self._reloading = False
+                    return
+                self._reload_pending = False
+            try:
+                self.load()
+            except Exception:
+                logger.exception("Reloading the suggest index failed")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "names": len(self._names),
+                "words": len(self._words),
+                "trigrams": len(self._trigrams),
+            }
+
+
+suggest_index = SuggestIndex()
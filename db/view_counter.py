@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import random
+import threading
+from datetime import datetime
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.sql.functions import coalesce
+from config import VIEW_SAMPLE_RATE
+from db.database import engine
+from db.models import DbMovie, DbMovieRequest
+from db.suggest_index import suggest_index
+
+logger = logging.getLogger(__name__)
+
+movies_table = DbMovie.__table__
+requests_table = DbMovieRequest.__table__
+
+
+class ViewCounter:
+    """
+    Collects the movie views in memory and writes them to the database in
+    batches, so that reading a movie never opens a write transaction.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        if not 0 < sample_rate <= 1:
+            raise ValueError("The view sample rate must be in (0, 1].")
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._views = {}
+        self._requests = []
+
+    def record(
+        self,
+        movie_id: int,
+        user_id: int,
+    ):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        with self._lock:
+            self._views[movie_id] = (
+                self._views.get(movie_id, 0) + 1 / self.sample_rate
+            )
+            self._requests.append(
+                {
+                    "movie_id": movie_id,
+                    "user_id": int(user_id),
+                    "request_time": datetime.now(),
+                }
+            )
+
+    def flush(self):
+        """
+        Writes the buffered views with one atomic increment per movie and
+        the request log rows with a single executemany insert.
+        Returns the number of views written.
+        """
+        with self._lock:
+            views, self._views = self._views, {}
+            requests, self._requests = self._requests, []
+
+        increments = []
+        remainders = {}
+        for movie_id, count in views.items():
+            # Sampled views are fractional, keep what is below one view.
+            whole = int(count)
+            if count - whole:
+                remainders[movie_id] = count - whole
+            if whole:
+                increments.append({"b_movie_id": movie_id, "b_views": whole})
+
+        try:
+            if increments or requests:
+                with engine.begin() as connection:
+                    if increments:
+                        connection.execute(
+                            update(movies_table)
+                            .where(movies_table.c.id == bindparam("b_movie_id"))
+                            .values(
+                                requests_count=coalesce(
+                                    movies_table.c.requests_count, 0
+                                )
+                                + bindparam("b_views")
+                            ),
+                            increments,
+                        )
+                    if requests:
+                        connection.execute(insert(requests_table), requests)
+        except Exception:
+            # Put the views back, they are retried on the next flush.
+            for increment in increments:
+                remainders[increment["b_movie_id"]] = (
+                    remainders.get(increment["b_movie_id"], 0)
+                    + increment["b_views"]
+                )
+            self._merge(remainders, requests)
+            raise
+
+        self._merge(remainders, [])
+        for increment in increments:
+            suggest_index.add_popularity(
+                "movie", increment["b_movie_id"], increment["b_views"]
+            )
+        return sum(increment["b_views"] for increment in increments)
+
+    def _merge(
+        self,
+        views: dict,
+        requests: list,
+    ):
+        with self._lock:
+            for movie_id, count in views.items():
+                self._views[movie_id] = self._views.get(movie_id, 0) + count
+            self._requests[:0] = requests
+
+    async def flush_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                logger.exception("Flushing the movie views failed")
+
+
+view_counter = ViewCounter(sample_rate=VIEW_SAMPLE_RATE)
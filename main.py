@@ -1,6 +1,7 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from routes import (
     directors,
     reviews,
@@ -8,17 +9,52 @@ from routes import (
     movies,
     categories,
     actors,
+    monitoring,
+    export,
+    suggest,
 )
 from auth import authentication
+from config import VIEW_FLUSH_INTERVAL
 from db import models
-from db.database import engine
+from db.database import async_engine, engine
+from db.db_movies import resume_poster_variants
+from db.pagination import NEXT_CURSOR_HEADER
 from db.seed_db import create_tables_and_seed
+from db.suggest_index import suggest_index
+from db.view_counter import view_counter
+from services.movie_service import close_http_client, start_http_client
+from services.poster_storage import (
+    POSTERS_DIRECTORY,
+    POSTERS_URL,
+    PosterStaticFiles,
+    PosterUploadLimit,
+)
+from services.poster_variants import shutdown_executor, start_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    start_executor()
+    await resume_poster_variants()
+    await asyncio.to_thread(suggest_index.load)
+    view_flusher = asyncio.create_task(
+        view_counter.flush_periodically(VIEW_FLUSH_INTERVAL),
+    )
+    yield
+    view_flusher.cancel()
+    # Write the views still in the buffer before shutting down
+    view_counter.flush()
+    await close_http_client()
+    shutdown_executor()
+    await async_engine.dispose()
 
 
 app = FastAPI(
     title="MoviesDB API",
     description="This is an movie DB API from the 40+ of the group!",
     version="1.4.0",
+    lifespan=lifespan,
 )
 
 origins = ["http://localhost:3000"]
@@ -30,7 +66,13 @@ app.include_router(categories.router)
 app.include_router(directors.router)
 app.include_router(actors.router)
 app.include_router(authentication.router)
+app.include_router(monitoring.router)
+app.include_router(export.router)
+app.include_router(suggest.router)
+
 
+# Added before CORSMiddleware, so the rejected uploads keep the CORS headers
+app.add_middleware(PosterUploadLimit)
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,11 +80,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.mount(
-    "/assets/posters",
-    StaticFiles(directory="assets/posters"),
+    POSTERS_URL,
+    PosterStaticFiles(directory=POSTERS_DIRECTORY),
     name="assets-posters",
 )
 
@@ -1,16 +1,18 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from auth import oauth2
-from db import db_actors
+from db import bulk_import, db_actors
 from db.database import get_db
+from db.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 from schemas.actors_schemas import (
     Actor,
     ActorDisplay,
     ActorFullUpdate,
     ActorPatch,
-    ActorAutoUpdate,
 )
+from services.etags import etag_matches, not_modified
+from services.response_cache import actor_cache, cached_response
 
 router = APIRouter(
     prefix="/actors",
@@ -58,17 +60,58 @@ def create_actor(
     "/",
     response_model=List[ActorDisplay],
 )
-def get_all_actors(db: Session = Depends(get_db)):
+def get_all_actors(
+    response: Response,
+    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
     """
-    Retrieves all actors from the database.
+    Retrieves all actors from the database. The list is paginated, the
+    cursor of the next page is returned in the X-Next-Cursor header.
 
     Parameters:
+    - response (Response): The FastAPI response object.
     - db (Session): Database session for executing database operations.
+    - cursor (Optional[str]): The X-Next-Cursor of the previous page.
+    - limit (int): Maximum number of actors in the page.
 
     Returns:
     - List[ActorDisplay]: A list of all actors.
     """
-    return db_actors.get_all_actors(db=db)
+    actors, next_cursor = db_actors.get_all_actors(
+        db=db,
+        cursor=cursor,
+        limit=limit,
+    )
+    set_next_cursor(response=response, next_cursor=next_cursor)
+    return actors
+
+
+def get_actor_or_404(
+    actor_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    Loads an actor by their ID. Used as a dependency by the endpoints
+    changing an actor.
+
+    Parameters:
+    - actor_id (int): The ID of the actor to retrieve.
+    - db (Session): Database session for executing database operations.
+
+    Raises:
+    - HTTPException: 404 Not Found if no actor with the specified ID exists.
+
+    Returns:
+    - DbActor: The requested actor.
+    """
+    actor = db_actors.get_actor(db, actor_id)
+    if actor is None:
+        raise HTTPException(
+            status_code=404, detail=f"Actor with id:{actor_id} not found"
+        )
+    return actor
 
 
 # Get Actor By Id
@@ -79,13 +122,17 @@ def get_all_actors(db: Session = Depends(get_db)):
 def get_actor_by_id(
     actor_id: int,
     db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
-    Retrieves an actor by their ID.
+    Retrieves an actor by their ID. The serialized actor is served from the
+    response cache when possible, and a 304 is returned when the client
+    already has the current version.
 
     Parameters:
     - actor_id (int): The ID of the actor to retrieve.
     - db (Session): Database session for executing database operations.
+    - if_none_match (Optional[str]): The ETag(s) the client already has.
 
     Raises:
     - HTTPException: 404 Not Found if no actor with the specified ID exists.
@@ -93,12 +140,20 @@ def get_actor_by_id(
     Returns:
     - ActorDisplay: The requested actor's information.
     """
-    actor = db_actors.get_actor(db, actor_id)
-    if actor is None:
+    etag = db_actors.get_actor_etag(db=db, actor_id=actor_id)
+    if etag is None:
         raise HTTPException(
             status_code=404, detail=f"Actor with id:{actor_id} not found"
         )
-    return actor
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return cached_response(
+        cache=actor_cache,
+        key=actor_id,
+        schema=ActorDisplay,
+        load=lambda: get_actor_or_404(actor_id=actor_id, db=db),
+        etag=etag,
+    )
 
 
 # Update Actor in DB
@@ -108,7 +163,7 @@ def get_actor_by_id(
 )
 def update_actor(
     request: ActorFullUpdate,
-    actor: Actor = Depends(get_actor_by_id),
+    actor: Actor = Depends(get_actor_or_404),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
@@ -142,7 +197,7 @@ def update_actor(
 )
 def patch_actor(
     request: ActorPatch,
-    actor: Actor = Depends(get_actor_by_id),
+    actor: Actor = Depends(get_actor_or_404),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
@@ -177,7 +232,7 @@ def patch_actor(
     status_code=status.HTTP_204_NO_CONTENT,
 )
 def delete_actor(
-    actor: Actor = Depends(get_actor_by_id),
+    actor: Actor = Depends(get_actor_or_404),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
@@ -208,11 +263,8 @@ def auto_add_actors(db: Session = Depends(get_db)):
     """
     THIS IS ONLY TO BE USED FOR TESTING PURPOSES
     """
-    import json
-
-    with open("example_files/example_actors.json", "r") as file:
-        actors = json.load(file)
-
-    for actor in actors:
-        db_actors.create_actor(db=db, request=ActorAutoUpdate(**actor))
+    bulk_import.import_paths(
+        db=db,
+        paths={"actors": bulk_import.EXAMPLE_FILES["actors"]},
+    )
     return {"message": "Actors added successfully"}
@@ -1,12 +1,14 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 
 from auth import oauth2
 from db import db_categories
 from db.database import get_db
 from schemas.categories_schemas import Category, CategoryBase
+from services.etags import etag_matches, not_modified
+from services.response_cache import cached_response, category_cache
 
 router = APIRouter(
     prefix="/categories",
@@ -54,17 +56,32 @@ def create_category(
     "/",
     response_model=List[Category],
 )
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    Retrieves all categories from the database.
+    Retrieves all categories from the database. The serialized list is
+    served from the response cache when possible, and a 304 is returned
+    when the client already has the current version.
 
     Parameters:
     - db (Session): Database session for executing database operations.
+    - if_none_match (Optional[str]): The ETag(s) the client already has.
 
     Returns:
     - List[Category]: A list of all category objects.
     """
-    return db_categories.get_all_categories(db=db)
+    etag = db_categories.get_categories_etag(db=db)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return cached_response(
+        cache=category_cache,
+        key="all",
+        schema=List[Category],
+        load=lambda: db_categories.get_all_categories(db=db),
+        etag=etag,
+    )
 
 
 # Get Category By Id
@@ -1,10 +1,13 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from auth import oauth2
-from db import db_directors
+from db import bulk_import, db_directors
 from db.database import get_db
+from db.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 from schemas.directors_schemas import Director, DirectorDisplay, DirectorUpdate
+from services.etags import etag_matches, not_modified
+from services.response_cache import cached_response, director_cache
 
 router = APIRouter(
     prefix="/directors",
@@ -48,17 +51,13 @@ def create_director(
     )
 
 
-# Get Director By Id
-@router.get(
-    "/{director_id}",
-    response_model=DirectorDisplay,
-)
-def get_director_by_id(
+def get_director_or_404(
     director_id: int,
     db: Session = Depends(get_db),
 ):
     """
-    Retrieves a director by their ID.
+    Loads a director by their ID. Used as a dependency by the endpoints
+    changing a director.
 
     Parameters:
     - director_id (int): The ID of the director to retrieve.
@@ -69,7 +68,7 @@ def get_director_by_id(
     not exist.
 
     Returns:
-    - DirectorDisplay: The requested director's information.
+    - DbDirector: The requested director.
     """
     director = db_directors.get_director(
         db=db,
@@ -84,22 +83,81 @@ def get_director_by_id(
         )
 
 
+# Get Director By Id
+@router.get(
+    "/{director_id}",
+    response_model=DirectorDisplay,
+)
+def get_director_by_id(
+    director_id: int,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Retrieves a director by their ID. The serialized director is served from
+    the response cache when possible, and a 304 is returned when the client
+    already has the current version.
+
+    Parameters:
+    - director_id (int): The ID of the director to retrieve.
+    - db (Session): Database session for executing database operations.
+    - if_none_match (Optional[str]): The ETag(s) the client already has.
+
+    Raises:
+    - HTTPException: 404 Not Found if the director with the specified ID does
+    not exist.
+
+    Returns:
+    - DirectorDisplay: The requested director's information.
+    """
+    etag = db_directors.get_director_etag(db=db, director_id=director_id)
+    if etag is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Director with id {director_id} not found",
+        )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return cached_response(
+        cache=director_cache,
+        key=director_id,
+        schema=DirectorDisplay,
+        load=lambda: get_director_or_404(director_id=director_id, db=db),
+        etag=etag,
+    )
+
+
 # Get All Directors
 @router.get(
     "/",
     response_model=List[DirectorDisplay],
 )
-def get_all_directors(db: Session = Depends(get_db)):
+def get_all_directors(
+    response: Response,
+    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
     """
-    Retrieves all directors from the database.
+    Retrieves all directors from the database. The list is paginated, the
+    cursor of the next page is returned in the X-Next-Cursor header.
 
     Parameters:
+    - response (Response): The FastAPI response object.
     - db (Session): Database session for executing database operations.
+    - cursor (Optional[str]): The X-Next-Cursor of the previous page.
+    - limit (int): Maximum number of directors in the page.
 
     Returns:
     - List[DirectorDisplay]: A list of all director objects.
     """
-    return db_directors.get_all_directors(db)
+    directors, next_cursor = db_directors.get_all_directors(
+        db=db,
+        cursor=cursor,
+        limit=limit,
+    )
+    set_next_cursor(response=response, next_cursor=next_cursor)
+    return directors
 
 
 # Update Director
@@ -109,7 +167,7 @@ def get_all_directors(db: Session = Depends(get_db)):
 )
 def update_director(
     request: DirectorUpdate,
-    director: Director = Depends(get_director_by_id),
+    director: Director = Depends(get_director_or_404),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
@@ -145,7 +203,7 @@ def update_director(
     status_code=status.HTTP_204_NO_CONTENT,
 )
 def delete_director(
-    director: Director = Depends(get_director_by_id),
+    director: Director = Depends(get_director_or_404),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
@@ -186,11 +244,8 @@ def auto_add_directors(db: Session = Depends(get_db)):
     """
     THIS IS ONLY TO BE USED FOR TESTING PURPOSES
     """
-    import json
-
-    with open("example_files/example_directors.json", "r") as file:
-        directors = json.load(file)
-
-    for director in directors:
-        db_directors.create_director(db=db, request=Director(**director))
+    bulk_import.import_paths(
+        db=db,
+        paths={"directors": bulk_import.EXAMPLE_FILES["directors"]},
+    )
     return {"message": "Directors added successfully"}
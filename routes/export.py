@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from auth import oauth2
+from db import export
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export Endpoints"],
+)
+
+AUTHENTICATION_TEXT = "You are not authorized to export the catalog!"
+
+
+@router.get("/{kind}")
+def export_catalog(
+    kind: str,
+    export_format: str = Query("ndjson", alias="format"),
+    token: str = Depends(oauth2.oauth2_schema),
+):
+    """
+    Streams all the movies (with their director, actors, categories and
+    rating aggregates), reviews or users as NDJSON or CSV. The rows are read
+    from the database in batches while the response is sent, so the export
+    of a large table does not use more memory. Requires an admin user token
+    for authentication.
+
+    Parameters:
+    - kind (str): movies, reviews or users.
+    - export_format (str): ndjson (default) or csv, given as `format`.
+    - token (str): Admin user's authentication token.
+
+    Raises:
+    - HTTPException: 404 error if the kind is unknown, 400 error if the
+        format is unknown.
+
+    Returns:
+    - StreamingResponse: One row per line, as a file attachment.
+    """
+    oauth2.admin_authentication(
+        token=token,
+        detail=AUTHENTICATION_TEXT,
+    )
+    if kind not in export.EXPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Nothing to export for {kind}.",
+        )
+    if export_format not in export.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid format. Only ndjson and csv formats accepted.",
+        )
+    return StreamingResponse(
+        export.iter_export(kind=kind, export_format=export_format),
+        media_type=export.EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{kind}.{export_format}"',
+        },
+    )
@@ -0,0 +1,61 @@
+from fastapi import APIRouter
+from db.database import get_pool_stats
+from db.suggest_index import suggest_index
+from db.db_extra_data import extra_data_flights
+from services.movie_service import extra_data_breaker
+from services.response_cache import caches
+
+router = APIRouter(
+    prefix="/monitoring",
+    tags=["Monitoring Endpoints"],
+)
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """
+    Returns the hit, miss and eviction counters of the response caches.
+
+    Returns:
+    - A dictionary with the statistics of every cache, by name.
+    """
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@router.get("/pool")
+def get_connection_pool_stats():
+    """
+    Returns the connection pool metrics of the sync and async database engines.
+
+    Returns:
+    - A dictionary with, for each engine, the checked out connections, the
+      time spent waiting for a connection, the overflow events and timeouts.
+    """
+    return get_pool_stats()
+
+
+@router.get("/extra_data")
+def get_extra_data_stats():
+    """
+    Returns the metrics of the calls to the external movie database.
+
+    Returns:
+    - A dictionary with the number of lookups, of upstream calls actually
+      made and of lookups coalesced into a call already in flight, and the
+      state of the circuit breaker.
+    """
+    return {
+        "single_flight": extra_data_flights.stats(),
+        "circuit_breaker": extra_data_breaker.stats(),
+    }
+
+
+@router.get("/suggest")
+def get_suggest_index_stats():
+    """
+    Returns the size of the in-memory index used by /suggest.
+
+    Returns:
+    - A dictionary with the number of indexed names and of distinct words.
+    """
+    return suggest_index.stats()
@@ -7,15 +7,20 @@ from fastapi import (
     APIRouter,
     Depends,
     File,
+    Header,
     HTTPException,
+    Query,
+    Response,
     UploadFile,
     status,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from auth import oauth2
-from db import db_movies
-from db.database import get_db
-from db.db_categories import get_category_with_name
+from db import bulk_import, db_movies
+from db.database import get_async_db, get_db
+from db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
+from db.db_categories import get_category_with_name_async
 from routes.reviews import all_reviews_for_movie
 from schemas.actors_schemas import ActorDisplay
 from schemas.directors_schemas import DirectorDisplay
@@ -26,9 +31,18 @@ from schemas.movies_schemas import (
     MovieDisplayAll,
     MovieDisplayOne,
     MovieExtraData,
+    MovieExtraDataBatch,
     MoviePatchUpdate,
+    MoviePosterStatus,
     MovieUpdate,
 )
+from services.etags import etag_matches, not_modified
+from services.poster_storage import save_upload
+from services.response_cache import (
+    cache_response,
+    get_cached_response,
+    movie_cache,
+)
 
 
 router = APIRouter(
@@ -43,64 +57,203 @@ AUTHENTICATION_TEXT = "You are not authorized to add, edit or delete a movie!"
     "/",
     response_model=Optional[List[MovieDisplayAll]],
 )
-def get_movies(
-    db: Session = Depends(get_db),
+async def get_movies(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     actor_id: int = None,
     director_id: int = None,
     category: CategoryMenu = None,
-    top_movies: int = None,
+    top_movies: int = Query(None, le=MAX_PAGE_SIZE),
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
     """
     Retrieves a list of movies from the database. Can filter movies by actor ID, director ID, category, and limit the result to top N movies based on average movie rate.
+    The list is paginated, the cursor of the next page is returned in the
+    X-Next-Cursor header.
 
     Parameters:
-    - db (Session): Database session for executing database operations.
+    - response (Response): The FastAPI response object.
+    - db (AsyncSession): Async database session for executing database
+        operations.
     - actor_id (int, optional): Filter movies by actor ID.
     - director_id (int, optional): Filter movies by director ID.
     - category (Category, optional): Filter movies by category.
-    - top_movies (int, optional): Limit the result to top N movies.
+    - top_movies (int, optional): Limit the result to top N movies, the
+        ranking is returned in a single page of at most MAX_PAGE_SIZE (200)
+        movies.
+    - cursor (str, optional): The X-Next-Cursor of the previous page.
+    - limit (int, optional): Maximum number of movies in the page.
 
     Raises:
     - HTTPException: 404 error if the movies list is empty or
         specific filters yield no results.
+    - HTTPException: 422 error if more than MAX_PAGE_SIZE top movies are
+        requested.
 
     Returns:
     - Optional[List[MovieDisplayAll]]: List of movies matching
         the criteria or None.
     """
-    movies = db_movies.get_all_movies(db=db)
-    if not movies:
+    category_id = None
+    if category:
+        category_id = await get_category_with_name_async(
+            db=db,
+            category_name=category,
+        )
+
+    movies, next_cursor = await db_movies.get_all_movies_async(
+        db=db,
+        actor_id=actor_id or None,
+        director_id=director_id or None,
+        category_id=category_id,
+        top_movies=top_movies,
+        cursor=cursor,
+        limit=limit,
+    )
+    if not movies and not cursor:
         raise HTTPException(
             status_code=404,
-            detail="The movies list is empty!",
+            detail=await movies_not_found_detail(
+                db=db,
+                actor_id=actor_id or None,
+                director_id=director_id or None,
+                category_id=category_id,
+            ),
         )
-    if actor_id:
-        movies = get_movies_by_actor(
-            movies=movies,
-            actor_id=actor_id,
+
+    set_next_cursor(response=response, next_cursor=next_cursor)
+    return movies
+
+
+def get_movie_or_404(
+    movie_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    Loads a movie by its ID without any side effect. Used as a dependency by
+    the endpoints working on a single movie.
+
+    Parameters:
+    - movie_id (int): The ID of the movie to retrieve.
+    - db (Session): Database session for executing database operations.
+
+    Raises:
+    - HTTPException: 404 error if the movie with the specified ID is not found.
+
+    Returns:
+    - DbMovie: The movie matching the ID.
+    """
+    movie = db_movies.get_movie(
+        db=db,
+        movie_id=movie_id,
+    )
+
+    if movie is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Movie with Id: {movie_id} not found",
         )
 
+    return movie
+
+
+# Search Movies by Title and Plot
+@router.get(
+    "/search",
+    response_model=List[MovieDisplayAll],
+)
+async def search_movies(
+    q: str,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    actor_id: int = None,
+    director_id: int = None,
+    category: CategoryMenu = None,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    """
+    Searches the movies whose title or plot contain the words of the query,
+    the last word being matched as a prefix. The best matches come first.
+    Can be combined with the actor ID, director ID and category filters.
+    The list is paginated, the cursor of the next page is returned in the
+    X-Next-Cursor header.
+
+    Parameters:
+    - q (str): The words to search for.
+    - response (Response): The FastAPI response object.
+    - db (AsyncSession): Async database session for executing database
+        operations.
+    - actor_id (int, optional): Filter movies by actor ID.
+    - director_id (int, optional): Filter movies by director ID.
+    - category (Category, optional): Filter movies by category.
+    - cursor (str, optional): The X-Next-Cursor of the previous page.
+    - limit (int, optional): Maximum number of movies in the page.
+
+    Raises:
+    - HTTPException: 400 error if the query contains no word.
+
+    Returns:
+    - List[MovieDisplayAll]: The matching movies, possibly none.
+    """
+    category_id = None
     if category:
-        movies = get_movies_by_category(
+        category_id = await get_category_with_name_async(
             db=db,
             category_name=category,
-            movies=movies,
         )
 
-    if director_id:
-        movies = get_movies_by_director(
-            movies=movies,
-            director_id=director_id,
-        )
+    movies, next_cursor = await db_movies.search_movies_async(
+        db=db,
+        query=q,
+        actor_id=actor_id or None,
+        director_id=director_id or None,
+        category_id=category_id,
+        cursor=cursor,
+        limit=limit,
+    )
+    set_next_cursor(response=response, next_cursor=next_cursor)
+    return movies
 
-    if top_movies:
-        movies = sorted(
-            movies,
-            key=lambda x: x.average_movie_rate if x.average_movie_rate else 0,
-            reverse=True,
-        )[:top_movies]
 
-    return movies
+# Get Extra Data for a page of Movies
+@router.get(
+    "/extra_data",
+    response_model=MovieExtraDataBatch,
+)
+async def get_movies_extra(
+    movie_ids: List[int] = Query(...),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Retrieves the extra data of several movies at once, e.g.
+    /movies/extra_data?movie_ids=1&movie_ids=2. The missing data is fetched
+    concurrently, so one slow movie does not delay the others.
+
+    Parameters:
+    - movie_ids (List[int]): The IDs of the movies, at most one page.
+    - db (AsyncSession): Async database session for executing database
+        operations.
+
+    Raises:
+    - HTTPException: 400 error if more movies than a page are requested.
+
+    Returns:
+    - MovieExtraDataBatch: The extra data found by movie ID, and the reason
+        why it is missing for the other movies.
+    """
+    movie_ids = list(dict.fromkeys(movie_ids))
+    if len(movie_ids) > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_PAGE_SIZE} movies can be requested at once.",
+        )
+    data, errors = await db_movies.get_movies_extra_async(
+        db=db,
+        movie_ids=movie_ids,
+    )
+    return {"data": data, "errors": errors}
 
 
 # Get Movie By Id
@@ -108,19 +261,24 @@ def get_movies(
     "/{movie_id}",
     response_model=Optional[MovieDisplayOne],
 )
-def get_movie_by_id(
+async def get_movie_by_id(
     movie_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token: Optional[str] = Depends(oauth2.oauth2_schema),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
-    Retrieves a movie by its ID. Requires a valid token to retrieve
-    user-specific information if provided.
+    Retrieves a movie by its ID and records the view. Requires a valid token
+    to retrieve user-specific information if provided. The serialized movie
+    is served from the response cache when possible, and a 304 is returned
+    when the client already has the current version.
 
     Parameters:
     - movie_id (int): The ID of the movie to retrieve.
-    - db (Session): Database session for executing database operations.
+    - db (AsyncSession): Async database session for executing database
+        operations.
     - token (Optional[str]): The OAuth2 token for user authentication.
+    - if_none_match (Optional[str]): The ETag(s) the client already has.
 
     Raises:
     - HTTPException: 404 error if the movie with the specified ID is not found.
@@ -129,28 +287,34 @@ def get_movie_by_id(
     - Optional[MovieDisplayOne]: The movie matching the ID or None.
     """
 
+    user_id = 0
     if token:
         payload = oauth2.decode_access_token(token=token)
         user_id = int(payload.get("user_id"))
-        movie = db_movies.get_movie(
-            db=db,
-            movie_id=movie_id,
-            user_id=user_id,
-        )
-    else:
-        movie = db_movies.get_movie(
-            db=db,
-            movie_id=movie_id,
-            user_id=0,
-        )
 
-    if movie is None:
+    etag = await db_movies.get_movie_etag_async(db=db, movie_id=movie_id)
+    if etag is None:
         raise HTTPException(
             status_code=404,
             detail=f"Movie with Id: {movie_id} not found",
         )
 
-    return movie
+    db_movies.record_movie_view(
+        movie_id=movie_id,
+        user_id=user_id,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response = get_cached_response(cache=movie_cache, key=movie_id, etag=etag)
+    if response is None:
+        response = cache_response(
+            cache=movie_cache,
+            key=movie_id,
+            schema=MovieDisplayOne,
+            value=await db_movies.get_movie_async(db=db, movie_id=movie_id),
+            etag=etag,
+        )
+    return response
 
 
 @router.get(
@@ -158,7 +322,7 @@ def get_movie_by_id(
     response_model=Optional[List[ReviewDisplayOne]],
 )
 def get_movie_reviews(
-    movie: MovieDisplayOne = Depends(get_movie_by_id),
+    movie: MovieDisplayOne = Depends(get_movie_or_404),
     db: Session = Depends(get_db),
     reviews: Optional[List[ReviewDisplayOne]] = Depends(all_reviews_for_movie),
     review_id: Optional[int] = None,
@@ -168,7 +332,7 @@ def get_movie_reviews(
     a specific review ID.
 
     Parameters:
-    - movie (MovieDisplayOne): The movie object obtained by `get_movie_by_id`.
+    - movie (MovieDisplayOne): The movie object obtained by `get_movie_or_404`.
     - db (Session): Database session for executing database operations.
     - reviews (Optional[List[ReviewDisplayOne]]): List of reviews for movie.
     - review_id (Optional[int]): Filter reviews by review ID.
@@ -193,7 +357,7 @@ def get_movie_reviews(
 )
 def get_movie_actors(
     db: Session = Depends(get_db),
-    movie: MovieDisplayOne = Depends(get_movie_by_id),
+    movie: MovieDisplayOne = Depends(get_movie_or_404),
     actor_id: Optional[int] = None,
 ):
     """
@@ -202,7 +366,7 @@ def get_movie_actors(
 
     Parameters:
     - db (Session): Database session for executing database operations.
-    - movie (MovieDisplayOne): The movie object obtained by `get_movie_by_id`.
+    - movie (MovieDisplayOne): The movie object obtained by `get_movie_or_404`.
     - actor_id (Optional[int]): Filter actors by actor ID.
 
     Raises:
@@ -228,12 +392,12 @@ def get_movie_actors(
     "/{movie_id}/director",
     response_model=DirectorDisplay,
 )
-def get_movie_director(movie: MovieDisplayOne = Depends(get_movie_by_id)):
+def get_movie_director(movie: MovieDisplayOne = Depends(get_movie_or_404)):
     """
     Retrieves the director of a specific movie.
 
     Parameters:
-    - movie (MovieDisplayOne): The movie object obtained by `get_movie_by_id`.
+    - movie (MovieDisplayOne): The movie object obtained by `get_movie_or_404`.
 
     Returns:
     - DirectorDisplay: The director of the movie.
@@ -241,20 +405,41 @@ def get_movie_director(movie: MovieDisplayOne = Depends(get_movie_by_id)):
     return DirectorDisplay.model_validate(movie.director)
 
 
+@router.get(
+    "/{movie_id}/poster_status",
+    response_model=MoviePosterStatus,
+)
+def get_movie_poster_status(movie: MovieDisplayOne = Depends(get_movie_or_404)):
+    """
+    Retrieves the processing status of the poster variants of a movie:
+    pending while they are generated, then ready or failed.
+
+    Parameters:
+    - movie (MovieDisplayOne): The movie object obtained by `get_movie_or_404`.
+
+    Returns:
+    - MoviePosterStatus: The poster URL, the status and the variant URLs.
+    """
+    return movie
+
+
 # Get Extra Data for a Movie by IMDB Id
 @router.get(
     "/{movie_id}/extra_data",
     response_model=MovieExtraData,
 )
 async def get_movie_extra(
-    movie: MovieBase = Depends(get_movie_by_id),
+    movie: MovieBase = Depends(get_movie_or_404),
 ):
     """
     Retrieves extra data for a movie by its IMDb ID.
-    This is an asynchronous function.
+    The data is stored locally and refreshed in the background once stale.
 
     Parameters:
-    - movie (MovieBase): The movie object obtained from `get_movie_by_id`.
+    - movie (MovieBase): The movie object obtained from `get_movie_or_404`.
+
+    Raises:
+    - HTTPException: If the movie has no IMDb ID or its data is not available.
 
     Returns:
     - MovieExtraData: Extra data about the movie.
@@ -285,7 +470,8 @@ def create_movie(
 
     Raises:
     - HTTPException: 409 Conflict if a movie with the same title already
-        exists.
+        exists, or with a similar title (typos included) released the same
+        year.
 
     Returns:
     - MovieDisplayOne: The created movie details.
@@ -296,11 +482,7 @@ def create_movie(
         detail=AUTHENTICATION_TEXT,
     )
 
-    if db_movies.get_movie(db=db, movie_title=movie.title):
-        raise HTTPException(
-            status_code=409,
-            detail=f"A movie with the title {movie.title} already exists.",
-        )
+    db_movies.check_duplicate_title(db=db, request=movie)
     return db_movies.create_movie(db, movie)
 
 
@@ -310,49 +492,62 @@ def create_movie(
     response_model=MovieDisplayOne,
 )
 async def upload_file(
-    movie: MovieDisplayOne = Depends(get_movie_by_id),
+    movie_id: int,
     upload_file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
     """
-    Uploads a poster image file for a movie. Validates file type and
-    updates the movie's poster URL in the database.
+    Uploads a poster image file for a movie. The file is streamed to disk,
+    its type is validated and it is stored under the hash of its content,
+    shared by the movies having the same poster. The movie's poster URL is
+    updated in the database and its resized variants are generated in the
+    background.
 
     Parameters:
-    - movie (MovieDisplayOne): The movie object to upload the poster for.
+    - movie_id (int): The ID of the movie to upload the poster for.
     - upload_file (UploadFile): The poster image file.
-    - db (Session): Database session for executing database operations.
+    - db (AsyncSession): Async database session for executing database
+        operations.
     - token (str): Admin user's authentication token.
 
     Raises:
-    - HTTPException: 400 error if the file type is not jpg or png.
+    - HTTPException: 404 error if the movie with the specified ID is not found.
+    - HTTPException: 400 error if the file type is not jpg or png, or its
+        content does not match its type.
+    - HTTPException: 413 error if the file is too large.
 
     Returns:
     - MovieDisplayOne: The updated movie details with the new poster URL.
     """
+    movie = await db_movies.get_movie_async(db=db, movie_id=movie_id)
+    if movie is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Movie with Id: {movie_id} not found",
+        )
+
     file_extension = os.path.splitext(upload_file.filename)[-1]
     if file_extension not in [".jpg", ".png"]:
         raise HTTPException(
             status_code=400,
             detail="Invalid file type. Only jpg and png types accepted.",
         )
-    title = movie.title.replace(" ", "_")
-    new_filename = f"{movie.id}_{title}{file_extension}"
-    contents = await upload_file.read()
-    # Check if the directory exists and if not, create it
-    directory = "assets/posters"
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-    with open(f"{directory}/{new_filename}", "wb") as f:
-        f.write(contents)
-    file_path = os.path.abspath(f"{directory}/{new_filename}")
-
-    return db_movies.update_movie_poster_url(
+    poster_url = await save_upload(
+        upload_file=upload_file,
+        file_extension=file_extension,
+    )
+
+    movie = await db_movies.update_movie_poster_url_async(
         db=db,
         movie=movie,
-        file_path=file_path,
+        poster_url=poster_url,
+    )
+    db_movies.schedule_poster_variants(
+        movie_id=movie.id,
+        poster_url=poster_url,
     )
+    return movie
 
 
 @router.post("/auto_add_movies", status_code=status.HTTP_201_CREATED)
@@ -360,15 +555,101 @@ def auto_add_movies(db: Session = Depends(get_db)):
     """
     THIS IS ONLY TO BE USED FOR TESTING PURPOSES
     """
-    import json
-
-    with open("example_files/example_movies.json", "r") as file:
-        movies = json.load(file)
-    for movie in movies:
-        db_movies.create_movie(db=db, request=MovieBase(**movie))
+    bulk_import.import_paths(
+        db=db,
+        paths={"movies": bulk_import.EXAMPLE_FILES["movies"]},
+    )
     return {"message": "Movies added successfully"}
 
 
+@router.post("/import")
+def import_catalog(
+    actors: Optional[UploadFile] = File(None),
+    directors: Optional[UploadFile] = File(None),
+    movies: Optional[UploadFile] = File(None),
+    reviews: Optional[UploadFile] = File(None),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2.oauth2_schema),
+):
+    """
+    Imports JSON array files of actors, directors, movies and reviews, in the
+    format of the files in example_files/, in a single transaction. Requires
+    an admin user token for authentication.
+
+    Parameters:
+    - actors, directors, movies, reviews (Optional[UploadFile]): The files
+        to import; at least one is required.
+    - db (Session): Database session for executing database operations.
+    - token (str): Admin user's authentication token.
+
+    Raises:
+    - HTTPException: 400 error if no file is given, 422 error with the kind
+      and the index of the first record that is not valid JSON or does not
+      match its schema. Nothing is imported then.
+
+    Returns:
+    - The number of imported and skipped records by kind.
+    """
+    oauth2.admin_authentication(
+        token=token,
+        detail=AUTHENTICATION_TEXT,
+    )
+    uploads = {
+        "actors": actors,
+        "directors": directors,
+        "movies": movies,
+        "reviews": reviews,
+    }
+    files = {kind: upload.file for kind, upload in uploads.items() if upload}
+    if not files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No file to import.",
+        )
+    try:
+        return bulk_import.import_files(db=db, files=files)
+    except bulk_import.InvalidRecord as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "kind": error.kind,
+                "index": error.index,
+                "errors": error.errors,
+            },
+        )
+
+
+@router.post("/ratings/recompute")
+def recompute_movie_ratings(
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2.oauth2_schema),
+):
+    """
+    Verifies the stored rating aggregates of all movies against their
+    reviews and fixes the ones that drifted. Requires an admin user token
+    for authentication.
+
+    Parameters:
+    - dry_run (bool): Only report the drifted movies, without fixing them.
+    - db (Session): Database session for executing database operations.
+    - token (str): Admin user's authentication token.
+
+    Returns:
+    - The number of drifted movies and their recomputed aggregates.
+    """
+    oauth2.admin_authentication(
+        token=token,
+        detail=AUTHENTICATION_TEXT,
+    )
+
+    drifted = db_movies.recompute_rating_aggregates(
+        db=db,
+        dry_run=dry_run,
+    )
+    return {"drifted": len(drifted), "movies": drifted}
+
+
 # ============================= PUT Endpoints ==========================
 # Update Movie
 @router.put(
@@ -377,7 +658,7 @@ def auto_add_movies(db: Session = Depends(get_db)):
 )
 def update_movie_data(
     movie_updates: MovieUpdate,
-    movie: MovieBase = Depends(get_movie_by_id),
+    movie: MovieBase = Depends(get_movie_or_404),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
@@ -387,7 +668,7 @@ def update_movie_data(
 
     Parameters:
     - movie_updates (MovieUpdate): The updated movie details.
-    - movie (MovieBase): The original movie object obtained `get_movie_by_id`.
+    - movie (MovieBase): The original movie object obtained `get_movie_or_404`.
     - db (Session): Database session for executing database operations.
     - token (str): Admin user's authentication token.
 
@@ -511,28 +792,29 @@ def delete_movie(
     return f"Movie with id: {movie_id} deleted successfully"
 
 
-# To Be used with the get_all_movies
-def get_movies_by_category(
-    db: Session,
-    category_name: str,
-    movies: List[MovieBase],
+# To be used with the get_movies when the filtered list is empty
+async def movies_not_found_detail(
+    db: AsyncSession,
+    actor_id: int = None,
+    director_id: int = None,
+    category_id: int = None,
 ):
-    category_id = get_category_with_name(
-        db=db,
-        category_name=category_name,
-    )
-
-    filtered_movies = []
-    for movie in movies:
-        for movie_category in movie.categories:
-            if category_id == int(movie_category.id):
-                filtered_movies.append(movie)
-    if filtered_movies == []:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No movies in category with ID: {category_id}",
-        )
-    return filtered_movies
+    """
+    Applies the filters one at a time, in the order the listing has always
+    reported them, to name the one that left the movies list empty.
+    """
+    filters = {}
+    if not await db_movies.movies_exist_async(db=db):
+        return "The movies list is empty!"
+    if actor_id is not None:
+        filters["actor_id"] = actor_id
+        if not await db_movies.movies_exist_async(db=db, **filters):
+            return f"No movies with actor ID: {actor_id}"
+    if category_id is not None:
+        filters["category_id"] = category_id
+        if not await db_movies.movies_exist_async(db=db, **filters):
+            return f"No movies in category with ID: {category_id}"
+    return f"No movies for director with ID:{director_id}."
 
 
 def get_movie_review(
@@ -548,38 +830,3 @@ def get_movie_review(
         status_code=409,
         detail=f"Review: {review_id}, doesn't belong to Movie: {movie.id}",
     )
-
-
-def get_movies_by_director(
-    movies: List[MovieDisplayAll],
-    director_id: int,
-):
-    filtered_movies = []
-    for movie in movies:
-        if int(movie.director.id) == director_id:
-            filtered_movies.append(movie)
-    if filtered_movies == []:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No movies for director with ID:{director_id}.",
-        )
-
-    return filtered_movies
-
-
-def get_movies_by_actor(
-    movies: List[MovieDisplayAll],
-    actor_id: int,
-):
-
-    filtered_movies = []
-    for movie in movies:
-        for movie_actor in movie.actors:
-            if actor_id == int(movie_actor.id):
-                filtered_movies.append(movie)
-    if filtered_movies == []:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No movies with actor ID: {actor_id}",
-        )
-    return filtered_movies
@@ -6,12 +6,15 @@ from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
+    Response,
     status,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from auth import oauth2
-from db import db_reviews
-from db.database import get_db
+from db import bulk_import, db_movies, db_reviews
+from db.database import get_async_db, get_db
+from db.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 from schemas.reviews_schemas import (
     CreateReview,
     ReviewDisplayOne,
@@ -41,11 +44,10 @@ def all_reviews_for_movie(
     Returns:
     - List[ReviewDisplayOne]: A list of reviews for the specified movie.
     """
-    reviews = get_all_reviews(db=db)
-    movie_reviews = []
-    for review in reviews:
-        if review.movie_id == int(movie_id):
-            movie_reviews.append(review)
+    movie_reviews = db_movies.get_movie_reviews(
+        db=db,
+        movie_id=int(movie_id),
+    )
 
     if movie_reviews == []:
         raise HTTPException(
@@ -88,9 +90,9 @@ def get_review_from_db(
     status_code=status.HTTP_201_CREATED,
     response_model=ReviewDisplayOne,
 )
-def create_review(
+async def create_review(
     request: CreateReview,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
     """
@@ -98,7 +100,8 @@ def create_review(
 
     Parameters:
     - request (CreateReview): The review data to create.
-    - db (Session): Database session for executing database operations.
+    - db (AsyncSession): Async database session for executing database
+        operations.
     - token (str): The OAuth2 token for user authentication.
 
     Returns:
@@ -107,7 +110,7 @@ def create_review(
 
     user = oauth2.decode_access_token(token=token).get("user_id")
 
-    new_review = db_reviews.create_review(
+    new_review = await db_reviews.create_review_async(
         db=db,
         request=request,
         user_id=user,
@@ -120,18 +123,27 @@ def create_review(
     "/",
     response_model=List[ReviewDisplayOne],
 )
-def get_all_reviews(
-    db: Session = Depends(get_db),
+async def get_all_reviews(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     user_id: Optional[int] = None,
     movie_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
     """
     Retrieves all reviews from the database. Can filter by user ID or movie ID.
+    The list is paginated, the cursor of the next page is returned in the
+    X-Next-Cursor header.
 
     Parameters:
-    - db (Session): Database session for executing database operations.
+    - response (Response): The FastAPI response object.
+    - db (AsyncSession): Async database session for executing database
+        operations.
     - user_id (Optional[int]): Optional user ID to filter reviews by user.
     - movie_id (Optional[int]): Optional movie ID to filter reviews by movie.
+    - cursor (Optional[str]): The X-Next-Cursor of the previous page.
+    - limit (int): Maximum number of reviews in the page.
 
     Raises:
     - HTTPException: 404 Not Found if no reviews match the criteria.
@@ -140,38 +152,30 @@ def get_all_reviews(
     - List[ReviewDisplayOne]: A list of reviews filtered by the provided
     criteria, if any.
     """
-    reviews = db_reviews.get_all_reviews(db)
-    if reviews is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No reviews to show!",
-        )
+    reviews, next_cursor = await db_reviews.get_all_reviews_async(
+        db=db,
+        user_id=user_id or None,
+        movie_id=movie_id or None,
+        cursor=cursor,
+        limit=limit,
+    )
 
-    if user_id:
-        user_reviews = []
-        for review in reviews:
-            if review.user_id == int(user_id):
-                user_reviews.append(review)
-        if user_reviews == []:
+    if not reviews and not cursor:
+        if user_id and not await db_reviews.reviews_exist_async(
+            db=db,
+            user_id=user_id,
+        ):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No reviews for user with ID: {user_id}!",
             )
-        else:
-            reviews = user_reviews
-    if movie_id:
-        movie_reviews = []
-        for review in reviews:
-            if review.movie_id == int(movie_id):
-                movie_reviews.append(review)
-        
-        if movie_reviews == []:
+        if movie_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No reviews for movie with ID: {movie_id}!",
             )
-        else:
-            reviews = movie_reviews
+
+    set_next_cursor(response=response, next_cursor=next_cursor)
     return reviews
 
 
@@ -294,21 +298,11 @@ def delete_review(
 
 @router.post("/auto_add_reviews")
 def auto_add_reviews(db: Session = Depends(get_db)):
-    import random
-    import json
-
     """
     THIS IS ONLY TO BE USED FOR TESTING PURPOSES
     """
-
-    with open("example_files/example_reviews.json", "r") as file:
-        reviews = json.load(file)
-
-    for review_data in reviews:
-        user_id = random.randint(1, 5)
-        db_reviews.create_review(
-            db=db,
-            request=CreateReview(**review_data),
-            user_id=user_id,
-        )
+    bulk_import.import_paths(
+        db=db,
+        paths={"reviews": bulk_import.EXAMPLE_FILES["reviews"]},
+    )
     return {"message": "Reviews added successfully"}
@@ -0,0 +1,79 @@
+from typing import List
+from fastapi import APIRouter
+from db.suggest_index import DEFAULT_SUGGESTIONS, MAX_SUGGESTIONS, suggest_index
+from schemas.suggest_schemas import FuzzySuggestion, Suggestion, SuggestionKind
+
+router = APIRouter(
+    prefix="/suggest",
+    tags=["Suggest Endpoints"],
+)
+
+
+@router.get(
+    "/",
+    response_model=List[Suggestion],
+)
+def suggest(
+    q: str,
+    kind: SuggestionKind = None,
+    limit: int = DEFAULT_SUGGESTIONS,
+):
+    """
+    Suggests movie titles, actor and director names while the user types.
+    The names must contain all the words of the query, the last word being
+    matched as a prefix. The suggestions come from an in-memory index, the
+    database is not queried.
+
+    Parameters:
+    - q (str): The text typed so far.
+    - kind (SuggestionKind, optional): Only suggest movies, actors or
+        directors.
+    - limit (int, optional): Maximum number of suggestions, at most 50.
+
+    Returns:
+    - List[Suggestion]: The matching names, the most viewed first.
+    """
+    suggestions = suggest_index.suggest(
+        query=q,
+        kind=kind.value if kind else None,
+        limit=min(max(limit, 1), MAX_SUGGESTIONS),
+    )
+    return [
+        Suggestion(kind=kind, id=entry_id, name=name)
+        for kind, entry_id, name in suggestions
+    ]
+
+
+@router.get(
+    "/fuzzy",
+    response_model=List[FuzzySuggestion],
+)
+def suggest_fuzzy(
+    q: str,
+    kind: SuggestionKind = None,
+    limit: int = DEFAULT_SUGGESTIONS,
+):
+    """
+    Finds the movie titles, actor and director names closest to a query
+    that may be misspelled, by the trigrams they have in common. Served
+    from the in-memory index, as the suggestions.
+
+    Parameters:
+    - q (str): The name to look for.
+    - kind (SuggestionKind, optional): Only look for movies, actors or
+        directors.
+    - limit (int, optional): Maximum number of names, at most 50.
+
+    Returns:
+    - List[FuzzySuggestion]: The names with their similarity to the query,
+        between 0 and 1, the most similar first.
+    """
+    matches = suggest_index.similar(
+        query=q,
+        kind=kind.value if kind else None,
+        limit=min(max(limit, 1), MAX_SUGGESTIONS),
+    )
+    return [
+        FuzzySuggestion(kind=kind, id=entry_id, name=name, similarity=score)
+        for kind, entry_id, name, score in matches
+    ]
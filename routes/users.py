@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from fastapi import (
     APIRouter,
     Depends,
@@ -6,11 +6,12 @@ from fastapi import (
     status,
     Response,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from auth import oauth2
-from db import db_users
-from db.database import get_db
-from routes.reviews import get_all_reviews
+from db import db_reviews, db_users
+from db.database import get_async_db, get_db
+from db.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 from schemas.users_schemas import (
     UserBase,
     UserDisplay,
@@ -64,17 +65,25 @@ def check_user(
     "/",
     response_model=List[UserDisplay],
 )
-def get_users(
-    db: Session = Depends(get_db),
+async def get_users(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2.oauth2_schema),
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
     """
     Retrieves all users from the database. This endpoint is restricted
-    to admins only.
+    to admins only. The list is paginated, the cursor of the next page is
+    returned in the X-Next-Cursor header.
 
     Parameters:
-    - db (Session): Database session for executing database operations.
+    - response (Response): The FastAPI response object.
+    - db (AsyncSession): Async database session for executing database
+        operations.
     - token (str): OAuth2 token to authenticate the request.
+    - cursor (Optional[str]): The X-Next-Cursor of the previous page.
+    - limit (int): Maximum number of users in the page.
 
     Raises:
     - HTTPException: 404 Not Found if the users table is empty.
@@ -88,13 +97,18 @@ def get_users(
         token=token,
         detail=AUTHENTICATION_TEXT,
     )
-    users = db_users.get_all_users(db=db)
+    users, next_cursor = await db_users.get_all_users_async(
+        db=db,
+        cursor=cursor,
+        limit=limit,
+    )
     if users is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Users table is empty!",
         )
 
+    set_next_cursor(response=response, next_cursor=next_cursor)
     return users
 
 
@@ -103,10 +117,10 @@ def get_users(
     "/{user_id}",
     response_model=UserDisplay,
 )
-def get_user(
+async def get_user(
     response: Response,
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2.oauth2_schema),
 ):
     """
@@ -116,7 +130,8 @@ def get_user(
     Parameters:
     - response (Response): The FastAPI response object.
     - user_id (int): The ID of the user to retrieve.
-    - db (Session): Database session for executing database operations.
+    - db (AsyncSession): Async database session for executing database
+        operations.
     - token (str): OAuth2 token to authenticate the request.
 
     Raises:
@@ -128,7 +143,12 @@ def get_user(
     """
 
     payload = oauth2.decode_access_token(token=token)
-    user = check_user(db=db, user_id=user_id)
+    user = await db_users.get_user_async(db=db, id=user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID: {user_id} not found",
+        )
 
     if payload.get("user_id") == user.id:
         return user
@@ -141,26 +161,35 @@ def get_user(
 
 @router.get("/{user_id}/reviews")
 def get_all_user_reviews(
+    response: Response,
     user_id=int,
     db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
     """
-    Retrieves all reviews made by a specific user.
+    Retrieves all reviews made by a specific user. The list is paginated,
+    the cursor of the next page is returned in the X-Next-Cursor header.
 
     Parameters:
+    - response (Response): The FastAPI response object.
     - user_id (int): The ID of the user whose reviews are to be retrieved.
     - db (Session): Database session for executing database operations.
+    - cursor (Optional[str]): The X-Next-Cursor of the previous page.
+    - limit (int): Maximum number of reviews in the page.
 
     Returns:
     - A list of reviews made by the specified user.
     """
 
-    db_reviews = get_all_reviews(db=db)
-    user_reviews = []
-    for review in db_reviews:
-        if review.user_id == int(user_id):
-            user_reviews.append(review)
+    user_reviews, next_cursor = db_reviews.get_all_reviews(
+        db=db,
+        user_id=int(user_id),
+        cursor=cursor,
+        limit=limit,
+    )
 
+    set_next_cursor(response=response, next_cursor=next_cursor)
     return user_reviews
 
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from schemas.users_schemas import Review
 from schemas.categories_schemas import Category
@@ -29,6 +29,8 @@ class MovieDisplayAll(BaseModel):
     imdb_id: Optional[str]
     categories: List[Category]
     poster_url: Optional[str] = None
+    # URLs of the resized posters, by variant and then by image format
+    poster_variants: Optional[Dict[str, Dict[str, str]]] = None
     reviews_count: Optional[int] = None
     average_movie_rate: Optional[float] = None
 
@@ -74,6 +76,20 @@ class MovieExtraData(BaseModel):
     Country: str
 
 
+class MovieExtraDataBatch(BaseModel):
+    data: Dict[int, MovieExtraData]
+    errors: Dict[int, str]
+
+
+class MoviePosterStatus(BaseModel):
+    poster_url: Optional[str] = None
+    poster_status: Optional[str] = None
+    poster_variants: Optional[Dict[str, Dict[str, str]]] = None
+
+    class Config:
+        from_attributes = True
+
+
 class MovieStats(BaseModel):
     id: int
     title: str
@@ -0,0 +1,18 @@
+from enum import Enum
+from pydantic import BaseModel
+
+
+class SuggestionKind(str, Enum):
+    movie = "movie"
+    actor = "actor"
+    director = "director"
+
+
+class Suggestion(BaseModel):
+    kind: SuggestionKind
+    id: int
+    name: str
+
+
+class FuzzySuggestion(Suggestion):
+    similarity: float
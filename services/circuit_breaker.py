@@ -0,0 +1,114 @@
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency. After `failure_threshold` failures in
+    a row the circuit opens and calls fail fast for `recovery_timeout`
+    seconds; then up to `half_open_max_calls` trial calls are let through.
+    A successful trial closes the circuit, a failed one opens it again.
+    The `ignored_errors` are raised to the caller without counting as a
+    success or a failure.
+
+    The state changes are made under a lock, never across an await, so the
+    breaker can be shared by the event loop and worker threads.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+        half_open_max_calls: int = 1,
+        ignored_errors: tuple = (),
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.ignored_errors = ignored_errors
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._rejected = 0
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if (
+            self._state == OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout
+        ):
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+
+    def _on_success(self):
+        self._state = CLOSED
+        self._failures = 0
+
+    def _on_failure(self):
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._open()
+
+    async def call(self, function, *args):
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (
+                state == HALF_OPEN and self._trial_calls >= self.half_open_max_calls
+            ):
+                self._rejected += 1
+                raise CircuitOpenError()
+            # The half-open period of the trial, it ends when the circuit opens
+            trial = self._times_opened if state == HALF_OPEN else None
+            if trial is not None:
+                self._trial_calls += 1
+        try:
+            result = await function(*args)
+        except self.ignored_errors:
+            raise
+        except Exception:
+            with self._lock:
+                self._on_failure()
+            raise
+        else:
+            with self._lock:
+                self._on_success()
+        finally:
+            # A cancelled trial, or one ending with an ignored error, counts
+            # neither way, its slot is freed for the next call
+            if trial is not None:
+                with self._lock:
+                    if self._times_opened == trial and self._trial_calls:
+                        self._trial_calls -= 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self._times_opened,
+                "rejected_calls": self._rejected,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+            }
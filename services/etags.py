@@ -0,0 +1,39 @@
+import hashlib
+from typing import Optional
+from fastapi import Response, status
+
+
+def make_etag(*parts):
+    """
+    Builds a weak ETag from the version numbers describing a resource.
+    """
+    digest = hashlib.blake2b(
+        "-".join(str(part or 0) for part in parts).encode(),
+        digest_size=8,
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(
+    if_none_match: Optional[str],
+    etag: str,
+):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as defined for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str):
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag},
+    )
+
+
+def bump_version(row):
+    """Marks a change of the row for its ETag, committed with the change."""
+    row.version = (row.version or 0) + 1
@@ -1,29 +1,112 @@
-import os
 import httpx
-from dotenv import load_dotenv
 from fastapi import HTTPException
+from config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN_MAX_CALLS,
+    BREAKER_RECOVERY_TIMEOUT,
+    EXTRA_DATA_DEADLINE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_POOL_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    MOVIE_DATA_API_HOST,
+    MOVIE_DATA_API_URL,
+    RAPIDAPI_KEY,
+)
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# One client shared by all the requests, opened and closed by the app lifespan,
+# so the connections to the movie database are kept alive between calls.
+http_client: httpx.AsyncClient = None
+
+
+def create_http_client():
+    return httpx.AsyncClient(
+        base_url=MOVIE_DATA_API_URL,
+        headers={
+            "X-RapidAPI-Key": RAPIDAPI_KEY or "",
+            "X-RapidAPI-Host": MOVIE_DATA_API_HOST,
+        },
+        timeout=httpx.Timeout(
+            HTTP_READ_TIMEOUT,
+            connect=HTTP_CONNECT_TIMEOUT,
+            pool=HTTP_POOL_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+async def start_http_client():
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+
+
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+def get_http_client():
+    # Outside of the lifespan (e.g. scripts), the client is opened on first use
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+
+# Waiting for a free connection of the shared client is a local burst, not
+# a failure of the movie database, so it does not open the circuit.
+extra_data_breaker = CircuitBreaker(
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=BREAKER_RECOVERY_TIMEOUT,
+    half_open_max_calls=BREAKER_HALF_OPEN_MAX_CALLS,
+    ignored_errors=(httpx.PoolTimeout,),
+)
+
+
+def extra_data_timeout():
+    # The deadline applies to the movie database only, the wait for a
+    # connection has its own timeout
+    return httpx.Timeout(
+        EXTRA_DATA_DEADLINE,
+        connect=min(HTTP_CONNECT_TIMEOUT, EXTRA_DATA_DEADLINE),
+        pool=HTTP_POOL_TIMEOUT,
+    )
+
+
+async def request_movie_extra_data(imdb_id: str):
+    response = await get_http_client().get(
+        "",
+        params={"r": "json", "i": imdb_id},
+        timeout=extra_data_timeout(),
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def get_movie_extra_data(imdb_id: str):
-    print('inside aseync func')
-    load_dotenv()
-    url = "https://movie-database-alternative.p.rapidapi.com/"
-    querystring = {"r": "json", "i": imdb_id}
-    headers = {
-        "X-RapidAPI-Key": os.getenv('RAPIDAPI_KEY'),
-        "X-RapidAPI-Host": "movie-database-alternative.p.rapidapi.com",
-    }
-    print('after creating headers')
-    async with httpx.AsyncClient() as client:
-        print('waiting for response')
-        response = await client.get(
-            url,
-            headers=headers,
-            params=querystring,
+    try:
+        data = await extra_data_breaker.call(request_movie_extra_data, imdb_id)
+    except CircuitOpenError:
+        raise HTTPException(
+            status_code=503,
+            detail="www.movie_database is not available, try again later",
+        )
+    except (httpx.HTTPError, ValueError):
+        raise HTTPException(
+            status_code=502,
+            detail="Could not reach www.movie_database",
         )
-    data = response.json()
-    print(f"the data are {data}")
-    if data["Response"] == "True":
+    if data.get("Response") == "True":
         extra_data = {
             "imdbRating": float(data["imdbRating"]),
             "imdbVotes": int(data["imdbVotes"].replace(",", "")),
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import re
+import uuid
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile, status
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, JSONResponse
+from starlette.staticfiles import NotModifiedResponse
+from config import POSTER_MAX_SIZE, UPLOAD_CHUNK_SIZE
+
+POSTERS_DIRECTORY = "assets/posters"
+POSTERS_URL = "/assets/posters"
+# Posters are stored under the SHA-256 of their content, their resized
+# variants under the same hash followed by the variant name
+HASHED_FILENAME = re.compile(r"[0-9a-f]{64}(_[a-z]+)?\.(png|jpg|webp)")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Room left for the multipart boundaries and headers around the poster in
+# the body of an upload request
+MULTIPART_OVERHEAD = 16 * 1024
+
+# Leading bytes of the accepted image formats, by file extension
+MAGIC_BYTES = {
+    ".png": b"\x89PNG\r\n\x1a\n",
+    ".jpg": b"\xff\xd8\xff",
+}
+
+
+def check_magic_bytes(
+    chunk: bytes,
+    file_extension: str,
+):
+    if not chunk.startswith(MAGIC_BYTES[file_extension]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The file content is not a valid {file_extension[1:]} image.",
+        )
+
+
+async def save_upload(
+    upload_file: UploadFile,
+    file_extension: str,
+    directory: str = POSTERS_DIRECTORY,
+):
+    """
+    Streams an uploaded image to `directory` chunk by chunk, so the memory
+    used does not depend on the file size, and stores it under the hash of
+    its content. The file is written under a temporary name and renamed
+    once complete; when the same image is already stored, the upload is
+    dropped and the existing file is shared.
+
+    Raises:
+    - HTTPException: 400 error if the content does not match the extension,
+      413 error if the file is larger than POSTER_MAX_SIZE.
+
+    Returns:
+    - The URL path of the stored poster.
+    """
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as file:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                if size == 0:
+                    check_magic_bytes(chunk, file_extension)
+                size += len(chunk)
+                if size > POSTER_MAX_SIZE:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"The file is larger than {POSTER_MAX_SIZE} bytes.",
+                    )
+                digest.update(chunk)
+                await file.write(chunk)
+        if size == 0:
+            check_magic_bytes(b"", file_extension)
+        filename = f"{digest.hexdigest()}{file_extension}"
+        file_path = os.path.join(directory, filename)
+        if await aiofiles.os.path.exists(file_path):
+            await aiofiles.os.remove(temp_path)
+        else:
+            await aiofiles.os.replace(temp_path, file_path)
+    except BaseException:
+        if await aiofiles.os.path.exists(temp_path):
+            await aiofiles.os.remove(temp_path)
+        raise
+    return f"{POSTERS_URL}/{filename}"
+
+
+class PosterUploadLimit:
+    """
+    Rejects the poster uploads whose Content-Length is larger than
+    POSTER_MAX_SIZE with a 413, before their body is received and spooled.
+    Uploads sent without a Content-Length (chunked) are received first, and
+    rejected by save_upload.
+    """
+
+    def __init__(
+        self,
+        app,
+        path_suffix: str = "/upload_poster",
+        max_size: int = POSTER_MAX_SIZE,
+    ):
+        self.app = app
+        self.path_suffix = path_suffix
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith(self.path_suffix):
+            length = Headers(scope=scope).get("content-length", "")
+            if length.isdigit() and int(length) > self.max_size + MULTIPART_OVERHEAD:
+                response = JSONResponse(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    content={
+                        "detail": f"The file is larger than {self.max_size} bytes."
+                    },
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class PosterStaticFiles(StaticFiles):
+    """
+    Serves the posters. The content of a hashed poster never changes, so it
+    is sent with a strong ETag made of its file name and may be cached
+    forever.
+    Range requests are handled by FileResponse.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope,
+        status_code: int = 200,
+    ):
+        filename = os.path.basename(full_path)
+        if HASHED_FILENAME.fullmatch(filename) is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers={
+                "etag": f'"{filename}"',
+                "cache-control": IMMUTABLE_CACHE_CONTROL,
+            },
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
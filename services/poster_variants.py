@@ -0,0 +1,110 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from config import POSTER_WORKERS
+from services.poster_storage import POSTERS_DIRECTORY, POSTERS_URL
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, without it no variant is generated
+    Image = None
+
+# Width in pixels of each variant; the height keeps the poster proportions
+VARIANT_WIDTHS = {
+    "thumbnail": 154,
+    "medium": 342,
+    "large": 780,
+}
+SAVE_FORMATS = {
+    ".jpg": "JPEG",
+    ".png": "PNG",
+    ".webp": "WEBP",
+}
+
+POSTER_PENDING = "pending"
+POSTER_READY = "ready"
+POSTER_FAILED = "failed"
+
+executor: ProcessPoolExecutor = None
+
+
+def variants_available():
+    return Image is not None
+
+
+def start_executor():
+    global executor
+    if executor is None and variants_available():
+        executor = ProcessPoolExecutor(
+            max_workers=POSTER_WORKERS,
+            # Forking the threaded server could copy a lock held by another
+            # thread into the worker, which would then wait on it forever
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+
+def shutdown_executor():
+    # The posters still pending are generated again at the next startup,
+    # see db_movies.resume_poster_variants
+    global executor
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+
+
+def generate_variants(
+    filename: str,
+    directory: str = POSTERS_DIRECTORY,
+):
+    """
+    Writes the resized copies of a poster, in its own format and in WebP,
+    next to it as <hash>_<variant>.<ext>. Runs in a worker process. Posters
+    shared by several movies are only resized once.
+
+    Returns:
+    - The file names of the variants, by variant and format.
+    """
+    digest, extension = os.path.splitext(filename)
+    variants = {}
+    with Image.open(os.path.join(directory, filename)) as poster:
+        poster.load()
+        for variant, width in VARIANT_WIDTHS.items():
+            variants[variant] = {}
+            for variant_extension in (extension, ".webp"):
+                variant_filename = f"{digest}_{variant}{variant_extension}"
+                variant_path = os.path.join(directory, variant_filename)
+                if not os.path.exists(variant_path):
+                    resized = poster.copy()
+                    # Never enlarges a poster smaller than the variant
+                    resized.thumbnail((width, width * 10))
+                    if variant_extension == ".jpg" and resized.mode != "RGB":
+                        resized = resized.convert("RGB")
+                    temp_path = f"{variant_path}.{os.getpid()}.part"
+                    resized.save(temp_path, SAVE_FORMATS[variant_extension])
+                    os.replace(temp_path, variant_path)
+                variants[variant][variant_extension[1:]] = variant_filename
+    return variants
+
+
+async def generate_variants_async(poster_url: str):
+    """
+    Generates the variants of the poster at `poster_url` in the process pool.
+
+    Returns:
+    - The URLs of the variants, by variant and format.
+    """
+    start_executor()
+    filename = poster_url.removeprefix(f"{POSTERS_URL}/")
+    variants = await asyncio.get_running_loop().run_in_executor(
+        executor,
+        generate_variants,
+        filename,
+    )
+    return {
+        variant: {
+            image_format: f"{POSTERS_URL}/{variant_filename}"
+            for image_format, variant_filename in formats.items()
+        }
+        for variant, formats in variants.items()
+    }
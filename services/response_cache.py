@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+from fastapi import Response
+from pydantic import TypeAdapter
+from config import CACHE_MAX_ENTRIES, CACHE_TTL
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with a time to live, holding serialized responses.
+    The write functions of the db modules invalidate the entries they touch.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=None):
+        """Drops one entry, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+movie_cache = ResponseCache()
+actor_cache = ResponseCache()
+director_cache = ResponseCache()
+category_cache = ResponseCache()
+
+_adapters = {}
+
+caches = {
+    "movies": movie_cache,
+    "actors": actor_cache,
+    "directors": director_cache,
+    "categories": category_cache,
+}
+
+
+def get_cached_response(
+    cache: ResponseCache,
+    key,
+    etag: str = None,
+):
+    """
+    Returns the cached response of `key`, None on a miss. When an ETag is
+    given, an entry cached for another ETag is stale.
+    """
+    entry = cache.get(key)
+    if entry is None or entry[0] != etag:
+        return None
+    return json_response(content=entry[1], etag=etag)
+
+
+def cache_response(
+    cache: ResponseCache,
+    key,
+    schema: Any,
+    value,
+    etag: str = None,
+):
+    """Serializes the value through `schema`, caches and returns it."""
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(schema)
+    content = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    cache.set(key, (etag, content))
+    return json_response(content=content, etag=etag)
+
+
+def cached_response(
+    cache: ResponseCache,
+    key,
+    schema: Any,
+    load: Callable,
+    etag: str = None,
+):
+    """
+    Returns the cached JSON of `key`, or loads the object, serializes it
+    through `schema` and caches it. Skips the response_model validation on
+    hits, as the content was already validated when it was cached.
+    """
+    response = get_cached_response(cache=cache, key=key, etag=etag)
+    if response is None:
+        response = cache_response(
+            cache=cache,
+            key=key,
+            schema=schema,
+            value=load(),
+            etag=etag,
+        )
+    return response
+
+
+def json_response(
+    content: bytes,
+    etag: str = None,
+):
+    response = Response(content=content, media_type="application/json")
+    if etag:
+        response.headers["ETag"] = etag
+    return response
+
+
+# Invalidation hooks called by the db write functions after they commit.
+# Actors and directors embed the titles of their movies and movies embed
+# the names of their actors, director and categories.
+def invalidate_movie(movie_id: int = None):
+    movie_cache.invalidate(movie_id)
+    actor_cache.invalidate()
+    director_cache.invalidate()
+
+
+def invalidate_actor(actor_id: int = None):
+    actor_cache.invalidate(actor_id)
+    movie_cache.invalidate()
+
+
+def invalidate_director(director_id: int = None):
+    director_cache.invalidate(director_id)
+    movie_cache.invalidate()
+
+
+def invalidate_categories():
+    category_cache.invalidate()
+    movie_cache.invalidate()
@@ -0,0 +1,39 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time: callers asking for a key that is
+    already being computed wait for the same result instead of starting
+    their own call.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self._calls = 0
+        self._executions = 0
+
+    async def do(self, key, function, *args):
+        self._calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self._executions += 1
+            # The call runs in its own task, so a caller going away does not
+            # cancel the work the other callers are waiting for.
+            task = asyncio.ensure_future(function(*args))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        # Only the call that finished, not a newer one started for the key
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self):
+        return {
+            "calls": self._calls,
+            "executions": self._executions,
+            "coalesced": self._calls - self._executions,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,87 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+# The application engines are created on import, keep them off moviesDB.db
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}",
+)
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from db.database import Base  # noqa: E402
+from db.models import (  # noqa: E402
+    DbActor,
+    DbCategory,
+    DbDirector,
+    DbMovie,
+    DbReview,
+    DbUser,
+)
+
+
+@contextmanager
+def count_queries(engine):
+    """Collects the statements run on the engine inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def add_catalog(
+    db: Session,
+    size: int,
+):
+    """
+    Adds `size` movies, each with its own director, two actors, two
+    categories and two reviews.
+    """
+    user = DbUser(username="reviewer", email="reviewer@example.com")
+    categories = [DbCategory(category_name=f"Category {i}") for i in range(2)]
+    db.add_all([user, *categories])
+    for i in range(size):
+        movie = DbMovie(
+            title=f"Movie {i}",
+            released_date=datetime(2000, 1, 1),
+            plot="Plot",
+            director=DbDirector(director_name=f"Director {i}"),
+            actors=[DbActor(actor_name=f"Actor {i}-{j}") for j in range(2)],
+            categories=categories,
+            rating_sum=15.0,
+            reviews_count=2,
+            average_movie_rate=7.5,
+        )
+        movie.reviews = [
+            DbReview(review_content="Review", user_rating=7.5, user=user)
+            for _ in range(2)
+        ]
+        db.add(movie)
+    db.commit()
+
+
+@pytest.fixture
+def catalog_engine(tmp_path):
+    """Returns a function creating a database holding a catalog of a size."""
+    engines = []
+
+    def create(size: int):
+        engine = create_engine(f"sqlite:///{tmp_path / f'catalog-{size}.db'}")
+        engines.append(engine)
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            add_catalog(db, size)
+        return engine
+
+    yield create
+    for engine in engines:
+        engine.dispose()
@@ -0,0 +1,129 @@
+import io
+import json
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from db import bulk_import
+from db.models import DbActor, DbMovie
+
+
+def read_array(text: str):
+    return list(bulk_import.iter_json_array(io.StringIO(text)))
+
+
+@pytest.mark.parametrize(
+    "text, items",
+    [
+        ("[]", []),
+        (" \n[ ]\n", []),
+        ("[1, 2]", [1, 2]),
+        ('[{"a": [1, 2]}, "b,]"]', [{"a": [1, 2]}, "b,]"]),
+        ("[[1], [2]]", [[1], [2]]),
+    ],
+)
+def test_json_array_items(text, items):
+    assert read_array(text) == items
+
+
+@pytest.mark.parametrize(
+    "text, index",
+    [
+        ("", 0),
+        ("  ", 0),
+        ('{"actor_name": "A"}', 0),
+        ('"abc"', 0),
+        ("[1 2]", 1),
+        ("[1,,2]", 1),
+        ("[,1]", 0),
+        ("[1,]", 1),
+        ("[1, 2]]", 2),
+        ("[1] [2]", 1),
+        ('[{"actor_name": "A"}', 1),
+        ('[{"actor_name": "A"', 0),
+        ("[1, 2", 2),
+    ],
+)
+def test_json_array_rejects_what_is_not_an_array(text, index):
+    with pytest.raises(bulk_import.InvalidRecord) as error:
+        read_array(text)
+    assert error.value.index == index
+
+
+def test_json_array_items_across_chunks(monkeypatch):
+    monkeypatch.setattr(bulk_import, "READ_SIZE", 3)
+    items = [12345, "a long string", {"actor_name": "A"}, [1.5, True, None]]
+    assert read_array(json.dumps(items)) == items
+
+
+def test_invalid_file_imports_nothing(catalog_engine):
+    engine = catalog_engine(1)
+    files = {
+        "actors": io.StringIO('[{"actor_name": "New actor"}]'),
+        "directors": io.StringIO('[{"director_name": "New director"}'),
+    }
+    with Session(engine) as db:
+        actors = db.scalar(select(func.count(DbActor.id)))
+        with pytest.raises(bulk_import.InvalidRecord) as error:
+            bulk_import.import_files(db=db, files=files)
+        assert (error.value.kind, error.value.index) == ("directors", 1)
+        assert db.scalar(select(func.count(DbActor.id))) == actors
+
+
+def test_import_links_the_records_and_updates_the_ratings(catalog_engine):
+    engine = catalog_engine(1)
+    files = {
+        "actors": io.StringIO(
+            json.dumps([{"actor_name": "Actor 0-0"}, {"actor_name": "New actor"}])
+        ),
+        "movies": io.StringIO(
+            json.dumps(
+                [
+                    {
+                        "title": "Imported",
+                        "released_date": "2001-01-01T00:00:00",
+                        "director_id": 1,
+                        "actors": [1, 3, 99],
+                        "categories": [1],
+                        "plot": "Plot",
+                        "poster_url": None,
+                        "imdb_id": None,
+                    },
+                    {
+                        "title": "Unknown director",
+                        "released_date": None,
+                        "director_id": 99,
+                        "plot": "Plot",
+                        "poster_url": None,
+                        "imdb_id": None,
+                    },
+                ]
+            )
+        ),
+        "reviews": io.BytesIO(
+            json.dumps(
+                [
+                    {"review_content": "A", "user_rating": 6.0, "movie_id": 1},
+                    {"review_content": "B", "user_rating": 4.0, "movie_id": 2},
+                    {"review_content": "C", "user_rating": 8.0, "movie_id": 2},
+                    {"review_content": "D", "user_rating": 5.0, "movie_id": 99},
+                ]
+            ).encode()
+        ),
+    }
+    with Session(engine) as db:
+        summary = bulk_import.import_files(db=db, files=files)
+        movie = db.scalars(select(DbMovie).filter(DbMovie.title == "Imported")).one()
+        first = db.get(DbMovie, 1)
+        assert summary == {
+            "actors": {"imported": 1, "skipped": 1},
+            "movies": {"imported": 1, "skipped": 1},
+            "reviews": {"imported": 3, "skipped": 1},
+        }
+        assert sorted(actor.actor_name for actor in movie.actors) == [
+            "Actor 0-0",
+            "New actor",
+        ]
+        assert [category.id for category in movie.categories] == [1]
+        assert movie.title_key == "imported"
+        assert (movie.reviews_count, movie.average_movie_rate) == (2, 6.0)
+        assert (first.reviews_count, first.average_movie_rate) == (3, 7.0)
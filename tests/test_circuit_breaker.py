@@ -0,0 +1,188 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+from fastapi import HTTPException
+from services import movie_service
+from services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+DEADLINE = 0.2
+RECOVERY_TIMEOUT = 0.3
+MOVIE_DATA = {
+    "Response": "True",
+    "imdbRating": "8.1",
+    "imdbVotes": "1,234",
+    "Language": "English",
+    "Country": "United States",
+}
+
+
+class FaultyUpstream(BaseHTTPRequestHandler):
+    """Stub of the movie database answering in the mode of the server."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.calls += 1
+        if self.server.mode == "slow":
+            time.sleep(DEADLINE * 3)
+        elif self.server.mode == "busy":
+            time.sleep(DEADLINE / 2)
+        status = 500 if self.server.mode == "error" else 200
+        body = json.dumps(MOVIE_DATA).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FaultyUpstream)
+    server.daemon_threads = True
+    server.mode = "ok"
+    server.calls = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(movie_service, "EXTRA_DATA_DEADLINE", DEADLINE)
+    monkeypatch.setattr(
+        movie_service,
+        "extra_data_breaker",
+        CircuitBreaker(
+            failure_threshold=2,
+            recovery_timeout=RECOVERY_TIMEOUT,
+        ),
+    )
+    monkeypatch.setattr(movie_service, "http_client", None)
+    monkeypatch.setattr(
+        movie_service,
+        "create_http_client",
+        lambda: httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{server.server_address[1]}/"
+        ),
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(imdb_id: str = "tt0000001"):
+    """Fetches the extra data, returns the status code of the error or 200."""
+
+    async def run():
+        try:
+            await movie_service.get_movie_extra_data(imdb_id)
+            return 200
+        except HTTPException as error:
+            return error.status_code
+        finally:
+            await movie_service.close_http_client()
+
+    return asyncio.run(run())
+
+
+def test_timeouts_open_the_circuit_and_calls_then_fail_fast(upstream):
+    upstream.mode = "slow"
+    started = time.perf_counter()
+    assert fetch() == 502
+    assert time.perf_counter() - started < DEADLINE * 2
+    assert fetch() == 502
+    assert movie_service.extra_data_breaker.state == OPEN
+
+    calls = upstream.calls
+    started = time.perf_counter()
+    assert fetch() == 503
+    assert time.perf_counter() - started < DEADLINE
+    assert upstream.calls == calls
+
+
+def test_failed_trial_opens_the_circuit_again(upstream):
+    upstream.mode = "error"
+    assert fetch() == 502
+    assert fetch() == 502
+    time.sleep(RECOVERY_TIMEOUT)
+    assert movie_service.extra_data_breaker.state == HALF_OPEN
+    assert fetch() == 502
+    assert movie_service.extra_data_breaker.state == OPEN
+    assert fetch() == 503
+
+
+def test_successful_trial_closes_the_circuit(upstream):
+    upstream.mode = "error"
+    assert fetch() == 502
+    assert fetch() == 502
+    time.sleep(RECOVERY_TIMEOUT)
+    upstream.mode = "ok"
+    assert fetch() == 200
+    assert movie_service.extra_data_breaker.state == CLOSED
+
+
+def test_waiting_for_a_connection_does_not_open_the_circuit(upstream, monkeypatch):
+    upstream.mode = "busy"
+    monkeypatch.setattr(movie_service, "HTTP_POOL_TIMEOUT", DEADLINE / 10)
+    monkeypatch.setattr(
+        movie_service,
+        "create_http_client",
+        lambda: httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{upstream.server_address[1]}/",
+            limits=httpx.Limits(max_connections=1),
+        ),
+    )
+
+    async def run():
+        async def fetch_one():
+            try:
+                await movie_service.get_movie_extra_data("tt0000001")
+                return 200
+            except HTTPException as error:
+                return error.status_code
+
+        try:
+            return await asyncio.gather(*(fetch_one() for _ in range(5)))
+        finally:
+            await movie_service.close_http_client()
+
+    assert sorted(asyncio.run(run())) == [200, 502, 502, 502, 502]
+    assert upstream.calls == 1
+    assert movie_service.extra_data_breaker.state == CLOSED
+    assert movie_service.extra_data_breaker.stats()["consecutive_failures"] == 0
+
+
+def test_cancelled_trial_frees_its_slot():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+
+    async def fail():
+        raise ValueError()
+
+    async def succeed():
+        return "data"
+
+    async def run():
+        with pytest.raises(ValueError):
+            await breaker.call(fail)
+        trial = asyncio.ensure_future(breaker.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        # The only trial slot is taken
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(succeed)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert breaker.state == HALF_OPEN
+        return await breaker.call(succeed)
+
+    assert asyncio.run(run()) == "data"
+    assert breaker.state == CLOSED
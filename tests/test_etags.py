@@ -0,0 +1,51 @@
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from db import db_movies, db_reviews
+from schemas.reviews_schemas import CreateReview
+from services.etags import etag_matches, make_etag
+
+
+def test_if_none_match_uses_the_weak_comparison():
+    etag = make_etag("movie", 1, 2)
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("movie", 1, 3), etag)
+
+
+def test_review_write_changes_the_movie_etag(catalog_engine):
+    engine = catalog_engine(2)
+
+    async def run():
+        async_engine = create_async_engine(
+            engine.url.set(drivername="sqlite+aiosqlite")
+        )
+        try:
+            # Configured as AsyncSessionLocal
+            async with AsyncSession(async_engine, expire_on_commit=False) as db:
+                before = await db_movies.get_movie_etag_async(db=db, movie_id=1)
+                other = await db_movies.get_movie_etag_async(db=db, movie_id=2)
+                unchanged = await db_movies.get_movie_etag_async(db=db, movie_id=1)
+                await db_reviews.create_review_async(
+                    db=db,
+                    request=CreateReview(
+                        review_content="Review", user_rating=9.0, movie_id=1
+                    ),
+                    user_id=1,
+                )
+                after = await db_movies.get_movie_etag_async(db=db, movie_id=1)
+                other_after = await db_movies.get_movie_etag_async(db=db, movie_id=2)
+                missing = await db_movies.get_movie_etag_async(db=db, movie_id=99)
+            return before, unchanged, after, other, other_after, missing
+        finally:
+            await async_engine.dispose()
+
+    before, unchanged, after, other, other_after, missing = asyncio.run(run())
+    # A client holding the old ETag gets a 304 until the review is written
+    assert etag_matches(before, unchanged)
+    assert not etag_matches(before, after)
+    assert other_after == other
+    assert missing is None
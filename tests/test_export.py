@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+import pytest
+from sqlalchemy.orm import sessionmaker
+from db import export
+
+
+@pytest.fixture
+def export_catalog(catalog_engine, monkeypatch):
+    """Points the export to a new catalog of the given size."""
+
+    def create(size: int):
+        engine = catalog_engine(size)
+        monkeypatch.setattr(export, "SessionLocal", sessionmaker(bind=engine))
+
+    return create
+
+
+def read_csv(kind: str):
+    text = "".join(export.iter_export(kind, "csv"))
+    return text, list(csv.DictReader(io.StringIO(text)))
+
+
+def test_csv_export_of_an_empty_table_has_its_header(export_catalog):
+    export_catalog(0)
+    text, rows = read_csv("reviews")
+    assert text.splitlines() == [",".join(export.export_fields("reviews"))]
+    assert rows == []
+
+
+def test_csv_export_of_the_movies(export_catalog):
+    export_catalog(2)
+    text, rows = read_csv("movies")
+    assert text.splitlines()[0] == ",".join(export.export_fields("movies"))
+    assert [row["title"] for row in rows] == ["Movie 0", "Movie 1"]
+    assert sorted(rows[0]["actors"].split(export.CSV_LIST_SEPARATOR)) == [
+        "Actor 0-0",
+        "Actor 0-1",
+    ]
+    assert rows[0]["director"] == "Director 0"
+    assert rows[0]["released_date"] == "2000-01-01T00:00:00"
+
+
+def test_ndjson_export_has_one_json_object_per_line(export_catalog):
+    export_catalog(2)
+    lines = list(export.iter_export("movies", "ndjson"))
+    assert all(line.endswith("\n") for line in lines)
+    movies = [json.loads(line) for line in lines]
+    assert [list(movie) for movie in movies] == [export.export_fields("movies")] * 2
+    assert sorted(movies[1]["categories"]) == ["Category 0", "Category 1"]
+    assert movies[1]["released_date"] == "2000-01-01T00:00:00"
+
+
+def test_users_export_leaves_the_password_out(export_catalog):
+    export_catalog(1)
+    users = [json.loads(line) for line in export.iter_export("users", "ndjson")]
+    assert [user["username"] for user in users] == ["reviewer"]
+    assert "password" not in users[0]
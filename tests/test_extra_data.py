@@ -0,0 +1,164 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from db import db_extra_data
+from db.models import DbMovieExtraData
+from services.single_flight import SingleFlight
+
+CONCURRENCY = 3
+
+
+def stale_entry(imdb_id: str):
+    return DbMovieExtraData(
+        imdb_id=imdb_id,
+        payload={"imdbRating": 1.0},
+        fetched_at=datetime.utcnow() - timedelta(seconds=20),
+        ttl=10,
+    )
+
+
+def test_stale_batch_refreshes_are_limited(monkeypatch):
+    imdb_ids = [f"tt{i:07d}" for i in range(20)]
+    running, most_running, fetched = [0], [0], []
+
+    async def get_stored_extra_data_batch(imdb_ids):
+        return {imdb_id: stale_entry(imdb_id) for imdb_id in imdb_ids}
+
+    async def get_movie_extra_data(imdb_id):
+        running[0] += 1
+        most_running[0] = max(most_running[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        fetched.append(imdb_id)
+        return {"imdbRating": 8.0}
+
+    async def store_extra_data(imdb_id, payload):
+        pass
+
+    monkeypatch.setattr(
+        db_extra_data, "get_stored_extra_data_batch", get_stored_extra_data_batch
+    )
+    monkeypatch.setattr(db_extra_data, "get_movie_extra_data", get_movie_extra_data)
+    monkeypatch.setattr(db_extra_data, "store_extra_data", store_extra_data)
+    monkeypatch.setattr(db_extra_data, "extra_data_flights", SingleFlight())
+    monkeypatch.setattr(
+        db_extra_data, "refresh_semaphore", asyncio.Semaphore(CONCURRENCY)
+    )
+
+    async def run():
+        payloads, errors = await db_extra_data.get_extra_data_batch(imdb_ids)
+        await asyncio.gather(*list(db_extra_data.refresh_tasks.values()))
+        return payloads, errors
+
+    payloads, errors = asyncio.run(run())
+    # The stale payloads are served, the refreshes run in the background
+    assert payloads == {imdb_id: {"imdbRating": 1.0} for imdb_id in imdb_ids}
+    assert errors == {}
+    assert sorted(fetched) == imdb_ids
+    assert most_running[0] == CONCURRENCY
+    assert db_extra_data.refresh_tasks == {}
+
+
+@pytest.fixture
+def extra_data_store(catalog_engine, monkeypatch):
+    """
+    Points the store to a new database and the upstream calls to a stub
+    counting them.
+    """
+    engine = catalog_engine(0)
+    fetched = []
+
+    async def get_movie_extra_data(imdb_id):
+        fetched.append(imdb_id)
+        return {"imdbRating": float(len(fetched))}
+
+    monkeypatch.setattr(db_extra_data, "get_movie_extra_data", get_movie_extra_data)
+    monkeypatch.setattr(db_extra_data, "extra_data_flights", SingleFlight())
+
+    async def run(coroutine):
+        async_engine = create_async_engine(
+            engine.url.set(drivername="sqlite+aiosqlite")
+        )
+        monkeypatch.setattr(
+            db_extra_data,
+            "AsyncSessionLocal",
+            async_sessionmaker(bind=async_engine, expire_on_commit=False),
+        )
+        try:
+            return await coroutine
+        finally:
+            await async_engine.dispose()
+
+    return fetched, lambda coroutine: asyncio.run(run(coroutine))
+
+
+def test_missing_entry_is_fetched_once_then_served(extra_data_store):
+    fetched, run = extra_data_store
+
+    async def get_twice():
+        first = await db_extra_data.get_extra_data("tt0000001")
+        return first, await db_extra_data.get_extra_data("tt0000001")
+
+    assert run(get_twice()) == ({"imdbRating": 1.0}, {"imdbRating": 1.0})
+    assert fetched == ["tt0000001"]
+
+
+def test_stale_entry_is_served_while_it_is_refreshed(extra_data_store, monkeypatch):
+    fetched, run = extra_data_store
+    monkeypatch.setattr(db_extra_data, "EXTRA_DATA_TTL", 0)
+
+    async def get_stale():
+        await db_extra_data.get_extra_data("tt0000001")
+        stale = await db_extra_data.get_extra_data("tt0000001")
+        await asyncio.gather(*list(db_extra_data.refresh_tasks.values()))
+        entry = await db_extra_data.get_stored_extra_data("tt0000001")
+        return stale, entry.payload
+
+    stale, stored = run(get_stale())
+    assert stale == {"imdbRating": 1.0}
+    # The refresh replaced the stored payload in the background
+    assert stored == {"imdbRating": 2.0}
+    assert fetched == ["tt0000001", "tt0000001"]
+
+
+def test_failed_refresh_keeps_the_stale_payload(extra_data_store, monkeypatch):
+    _, run = extra_data_store
+    monkeypatch.setattr(db_extra_data, "EXTRA_DATA_TTL", 0)
+
+    async def fail(imdb_id):
+        raise HTTPException(status_code=502, detail="down")
+
+    async def get_stale():
+        await db_extra_data.get_extra_data("tt0000001")
+        monkeypatch.setattr(db_extra_data, "get_movie_extra_data", fail)
+        stale = await db_extra_data.get_extra_data("tt0000001")
+        await asyncio.gather(*list(db_extra_data.refresh_tasks.values()))
+        return stale, await db_extra_data.get_extra_data("tt0000001")
+
+    assert run(get_stale()) == ({"imdbRating": 1.0}, {"imdbRating": 1.0})
+
+
+def test_batch_misses_are_fetched_concurrently_with_their_errors(
+    extra_data_store, monkeypatch
+):
+    _, run = extra_data_store
+    monkeypatch.setattr(db_extra_data, "EXTRA_DATA_CONCURRENCY", CONCURRENCY)
+    running, most_running = [0], [0]
+
+    async def get_movie_extra_data(imdb_id):
+        running[0] += 1
+        most_running[0] = max(most_running[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        if imdb_id == "tt0000000":
+            raise HTTPException(status_code=400, detail="Not available")
+        return {"imdbRating": 8.0}
+
+    monkeypatch.setattr(db_extra_data, "get_movie_extra_data", get_movie_extra_data)
+    imdb_ids = [f"tt{i:07d}" for i in range(10)]
+    payloads, errors = run(db_extra_data.get_extra_data_batch(imdb_ids + imdb_ids))
+    assert payloads == {imdb_id: {"imdbRating": 8.0} for imdb_id in imdb_ids[1:]}
+    assert errors == {"tt0000000": "Not available"}
+    assert most_running[0] == CONCURRENCY
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from conftest import count_queries
+from db import db_actors, db_directors, db_movies
+from schemas.actors_schemas import ActorDisplay
+from schemas.directors_schemas import DirectorDisplay
+from schemas.movies_schemas import MovieDisplayAll
+
+# The listings must not run a query per row: one row and a page of rows
+# cost the same number of queries, serialization of the response included.
+PAGE_ROWS = 25
+
+LISTINGS = {
+    "movies": (lambda db: db_movies.get_all_movies(db), MovieDisplayAll),
+    "top_movies": (
+        lambda db: db_movies.get_all_movies(db, top_movies=PAGE_ROWS),
+        MovieDisplayAll,
+    ),
+    "actors": (lambda db: db_actors.get_all_actors(db), ActorDisplay),
+    "directors": (lambda db: db_directors.get_all_directors(db), DirectorDisplay),
+}
+
+
+def listing_queries(
+    engine,
+    listing: str,
+    rows_expected: int,
+):
+    list_rows, display = LISTINGS[listing]
+    with Session(engine) as db, count_queries(engine) as statements:
+        rows, _ = list_rows(db)
+        assert len(rows) >= rows_expected
+        for row in rows:
+            display.model_validate(row, from_attributes=True)
+    return len(statements)
+
+
+@pytest.mark.parametrize("listing", LISTINGS)
+def test_listing_runs_a_constant_number_of_queries(catalog_engine, listing):
+    one = listing_queries(catalog_engine(1), listing, 1)
+    many = listing_queries(catalog_engine(PAGE_ROWS), listing, PAGE_ROWS)
+    assert one == many
+
+
+async def async_movie_listing_queries(engine):
+    async_engine = create_async_engine(
+        engine.url.set(drivername="sqlite+aiosqlite")
+    )
+    try:
+        async with AsyncSession(async_engine) as db:
+            with count_queries(async_engine.sync_engine) as statements:
+                movies, _ = await db_movies.get_all_movies_async(db)
+                for movie in movies:
+                    MovieDisplayAll.model_validate(movie, from_attributes=True)
+        return len(statements)
+    finally:
+        await async_engine.dispose()
+
+
+def test_async_movie_listing_runs_a_constant_number_of_queries(catalog_engine):
+    one = asyncio.run(async_movie_listing_queries(catalog_engine(1)))
+    many = asyncio.run(async_movie_listing_queries(catalog_engine(PAGE_ROWS)))
+    assert one == many
@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from db.pool import MonitoredQueuePool
+
+
+def test_pool_counts_overflow_events_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=2,
+        pool_timeout=0.05,
+    )
+    try:
+        connections = [engine.connect() for _ in range(3)]
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        for connection in connections:
+            connection.close()
+        # The pooled connection is reused, nothing overflows
+        engine.connect().close()
+        stats = engine.pool.stats()
+    finally:
+        engine.dispose()
+    assert stats["checkouts"] == 5
+    assert stats["overflow_events"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["max_overflow"] == 2
+    assert stats["wait_seconds_max"] >= 0.05
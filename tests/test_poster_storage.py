@@ -0,0 +1,96 @@
+import asyncio
+import io
+import os
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+from services import poster_storage
+from services.poster_storage import (
+    MAGIC_BYTES,
+    PosterStaticFiles,
+    PosterUploadLimit,
+    save_upload,
+)
+
+PNG = MAGIC_BYTES[".png"] + b"x" * 100
+
+
+def save(content: bytes, directory, file_extension: str = ".png"):
+    upload_file = UploadFile(file=io.BytesIO(content), filename=f"a{file_extension}")
+    return asyncio.run(
+        save_upload(
+            upload_file=upload_file,
+            file_extension=file_extension,
+            directory=str(directory),
+        )
+    )
+
+
+def test_same_poster_is_stored_once_under_its_hash(tmp_path):
+    first = save(PNG, tmp_path)
+    assert save(PNG, tmp_path) == first
+    assert os.listdir(tmp_path) == [os.path.basename(first)]
+
+
+@pytest.mark.parametrize(
+    "content, file_extension, status_code",
+    [
+        (PNG, ".jpg", 400),
+        (b"", ".png", 400),
+        (PNG + b"x" * 1000, ".png", 413),
+    ],
+)
+def test_rejected_upload_leaves_no_file(
+    tmp_path, monkeypatch, content, file_extension, status_code
+):
+    monkeypatch.setattr(poster_storage, "POSTER_MAX_SIZE", 1000)
+    with pytest.raises(HTTPException) as error:
+        save(content, tmp_path, file_extension)
+    assert error.value.status_code == status_code
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_announcing_a_large_body_is_rejected_unread():
+    received = []
+
+    async def upload_poster(request):
+        received.append(len(await request.body()))
+        return PlainTextResponse("saved")
+
+    app = Starlette(
+        routes=[Route("/movies/1/upload_poster", upload_poster, methods=["POST"])]
+    )
+    client = TestClient(PosterUploadLimit(app, max_size=1000))
+    too_large = 1000 + poster_storage.MULTIPART_OVERHEAD + 1
+
+    response = client.post("/movies/1/upload_poster", content=b"x" * too_large)
+    assert response.status_code == 413
+    assert received == []
+
+    response = client.post("/movies/1/upload_poster", content=b"x" * 1000)
+    assert response.status_code == 200
+    assert received == [1000]
+
+
+def test_hashed_posters_are_cached_forever(tmp_path):
+    poster_url = save(PNG, tmp_path)
+    filename = os.path.basename(poster_url)
+    (tmp_path / "unhashed.png").write_bytes(PNG)
+    app = Starlette(routes=[Mount("/posters", PosterStaticFiles(directory=tmp_path))])
+    client = TestClient(app)
+
+    response = client.get(f"/posters/{filename}")
+    assert response.content == PNG
+    assert response.headers["etag"] == f'"{filename}"'
+    assert response.headers["cache-control"] == poster_storage.IMMUTABLE_CACHE_CONTROL
+    response = client.get(
+        f"/posters/{filename}", headers={"If-None-Match": f'"{filename}"'}
+    )
+    assert response.status_code == 304
+
+    response = client.get("/posters/unhashed.png")
+    assert response.status_code == 200
+    assert "immutable" not in response.headers.get("cache-control", "")
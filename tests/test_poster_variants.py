@@ -0,0 +1,40 @@
+import os
+import pytest
+from services.poster_variants import VARIANT_WIDTHS, generate_variants
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def write_poster(directory, size, filename: str = f"{'a' * 64}.png"):
+    Image.new("RGBA", size, (200, 30, 30, 255)).save(directory / filename)
+    return filename
+
+
+def test_variants_in_the_poster_format_and_webp(tmp_path):
+    filename = write_poster(tmp_path, (1000, 1500))
+    variants = generate_variants(filename, directory=str(tmp_path))
+    assert set(variants) == set(VARIANT_WIDTHS)
+    for variant, width in VARIANT_WIDTHS.items():
+        assert set(variants[variant]) == {"png", "webp"}
+        for variant_filename in variants[variant].values():
+            with Image.open(tmp_path / variant_filename) as image:
+                assert image.size == (width, width * 3 // 2)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+
+def test_small_poster_is_not_enlarged(tmp_path):
+    filename = write_poster(tmp_path, (200, 300))
+    variants = generate_variants(filename, directory=str(tmp_path))
+    with Image.open(tmp_path / variants["large"]["png"]) as image:
+        assert image.size == (200, 300)
+    with Image.open(tmp_path / variants["thumbnail"]["png"]) as image:
+        assert image.size == (154, 231)
+
+
+def test_shared_poster_is_resized_once(tmp_path):
+    filename = write_poster(tmp_path, (1000, 1500))
+    variants = generate_variants(filename, directory=str(tmp_path))
+    path = tmp_path / variants["medium"]["webp"]
+    os.utime(path, (0, 0))
+    assert generate_variants(filename, directory=str(tmp_path)) == variants
+    assert path.stat().st_mtime == 0
@@ -0,0 +1,71 @@
+import json
+import time
+from sqlalchemy.orm import Session
+from db import db_movies
+from schemas.movies_schemas import MovieDisplayOne
+from services.response_cache import (
+    ResponseCache,
+    actor_cache,
+    cache_response,
+    cached_response,
+    get_cached_response,
+    invalidate_movie,
+    movie_cache,
+)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_their_ttl():
+    cache = ResponseCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_entry_cached_for_another_etag_is_stale():
+    cache = ResponseCache()
+    cache_response(cache=cache, key=1, schema=dict, value={"a": 1}, etag='W/"1"')
+    assert get_cached_response(cache=cache, key=1, etag='W/"2"') is None
+    response = get_cached_response(cache=cache, key=1, etag='W/"1"')
+    assert response.headers["ETag"] == 'W/"1"'
+    assert json.loads(response.body) == {"a": 1}
+
+
+def test_hits_do_not_load_the_movie(catalog_engine):
+    cache = ResponseCache()
+    loads = []
+
+    with Session(catalog_engine(1)) as db:
+
+        def load():
+            loads.append(1)
+            return db_movies.get_movie(db=db, movie_id=1)
+
+        first = cached_response(cache=cache, key=1, schema=MovieDisplayOne, load=load)
+        second = cached_response(cache=cache, key=1, schema=MovieDisplayOne, load=load)
+    assert loads == [1]
+    assert first.body == second.body
+    assert json.loads(second.body)["title"] == "Movie 0"
+    assert cache.stats()["hits"] == 1
+
+
+def test_movie_write_drops_the_pages_embedding_the_movie():
+    movie_cache.set(1, "movie")
+    movie_cache.set(2, "other movie")
+    actor_cache.set(1, "actor")
+    invalidate_movie(1)
+    assert movie_cache.get(1) is None
+    assert movie_cache.get(2) == "other movie"
+    assert actor_cache.get(1) is None
+    movie_cache.invalidate()
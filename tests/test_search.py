@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from db import db_movies
+from db.models import DbMovie
+from db.search import create_search_index, match_expression
+
+CATALOG_SIZE = 10
+
+
+def search_pages(engine, query: str, limit: int):
+    """Follows the cursors of a search, returns the titles of each page."""
+
+    async def run():
+        async_engine = create_async_engine(
+            engine.url.set(drivername="sqlite+aiosqlite")
+        )
+        pages, cursor = [], None
+        try:
+            async with AsyncSession(async_engine) as db:
+                while True:
+                    movies, cursor = await db_movies.search_movies_async(
+                        db=db, query=query, cursor=cursor, limit=limit
+                    )
+                    pages.append([movie.title for movie in movies])
+                    if cursor is None:
+                        return pages
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def search_engine(catalog_engine):
+    engine = catalog_engine(CATALOG_SIZE)
+    create_search_index(engine)
+    return engine
+
+
+def test_match_expression_quotes_the_words():
+    assert match_expression('star "wars" NOT') == '"star" "wars" "NOT"*'
+    assert match_expression("the go") == '"the" "go"'
+    assert match_expression(" -*- ") is None
+
+
+def test_search_cursor_round_trip_returns_each_match_once(search_engine):
+    pages = search_pages(search_engine, "movi", limit=4)
+    assert [len(page) for page in pages] == [4, 4, 2]
+    titles = [title for page in pages for title in page]
+    assert sorted(titles) == sorted(f"Movie {i}" for i in range(CATALOG_SIZE))
+
+
+def test_search_matches_all_the_words(search_engine):
+    assert search_pages(search_engine, "movie 7", limit=4) == [["Movie 7"]]
+    assert search_pages(search_engine, "movie unknown", limit=4) == [[]]
+
+
+def test_search_without_a_word_is_rejected(search_engine):
+    with pytest.raises(HTTPException) as error:
+        search_pages(search_engine, "?!", limit=4)
+    assert error.value.status_code == 400
+
+
+def test_search_index_follows_the_title_updates(search_engine):
+    with Session(search_engine) as db:
+        db.get(DbMovie, 1).title = "Zebra"
+        db.commit()
+    assert search_pages(search_engine, "zebra", limit=4) == [["Zebra"]]
+    assert "Movie 0" not in search_pages(search_engine, "movie", limit=20)[0]
@@ -0,0 +1,31 @@
+import asyncio
+from db import db_extra_data
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_misses_fetch_and_store_once(monkeypatch):
+    fetched, stored = [], []
+
+    async def get_movie_extra_data(imdb_id):
+        fetched.append(imdb_id)
+        await asyncio.sleep(0.05)
+        return {"imdbRating": 8.0}
+
+    async def store_extra_data(imdb_id, payload):
+        stored.append(imdb_id)
+
+    monkeypatch.setattr(db_extra_data, "get_movie_extra_data", get_movie_extra_data)
+    monkeypatch.setattr(db_extra_data, "store_extra_data", store_extra_data)
+    monkeypatch.setattr(db_extra_data, "extra_data_flights", SingleFlight())
+
+    async def run():
+        return await asyncio.gather(
+            *(db_extra_data.fetch_extra_data("tt0000001") for _ in range(10)),
+            db_extra_data.fetch_extra_data("tt0000002"),
+        )
+
+    payloads = asyncio.run(run())
+    assert payloads == [{"imdbRating": 8.0}] * 11
+    assert sorted(fetched) == ["tt0000001", "tt0000002"]
+    assert sorted(stored) == ["tt0000001", "tt0000002"]
+    assert db_extra_data.extra_data_flights.stats()["in_flight"] == 0
@@ -0,0 +1,137 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session, sessionmaker
+from db import db_movies
+from db import suggest_index as suggest_index_module
+from db.models import DbMovie
+from db.suggest_index import SuggestIndex
+from schemas.movies_schemas import MovieBase
+
+
+@pytest.fixture
+def index():
+    index = SuggestIndex()
+    index.add("movie", 1, "The Godfather", popularity=10)
+    index.add("movie", 2, "The Godfather Part II", popularity=20)
+    index.add("movie", 3, "Gods and Monsters", popularity=5)
+    index.add("actor", 1, "Gael García Bernal", popularity=1)
+    index.add("director", 1, "Francis Ford Coppola", popularity=30)
+    return index
+
+
+def test_prefix_suggestions_most_popular_first(index):
+    assert index.suggest("god") == [
+        ("movie", 2, "The Godfather Part II"),
+        ("movie", 1, "The Godfather"),
+        ("movie", 3, "Gods and Monsters"),
+    ]
+    assert index.suggest("the godf", limit=1) == [
+        ("movie", 2, "The Godfather Part II")
+    ]
+
+
+def test_suggestions_ignore_case_and_accents(index):
+    assert index.suggest("GARCIA") == [("actor", 1, "Gael García Bernal")]
+    assert index.suggest("garcía b") == [("actor", 1, "Gael García Bernal")]
+
+
+def test_suggestions_of_one_kind(index):
+    assert index.suggest("g", kind="actor") == [("actor", 1, "Gael García Bernal")]
+    assert index.suggest("f", kind="director") == [
+        ("director", 1, "Francis Ford Coppola")
+    ]
+
+
+def test_short_prefix_ranking_follows_the_popularity(index):
+    assert [entry[1] for entry in index.suggest("g", kind="movie")] == [2, 1, 3]
+    index.add_popularity("movie", 3, 100)
+    assert [entry[1] for entry in index.suggest("g", kind="movie")] == [3, 2, 1]
+
+
+def test_renamed_and_removed_names(index):
+    index.add("movie", 1, "Apocalypse Now")
+    index.remove("movie", 3)
+    assert index.suggest("god") == [("movie", 2, "The Godfather Part II")]
+    assert index.suggest("apoc") == [("movie", 1, "Apocalypse Now")]
+
+
+def test_index_is_loaded_from_the_catalog(catalog_engine, monkeypatch):
+    engine = catalog_engine(3)
+    monkeypatch.setattr(suggest_index_module, "SessionLocal", sessionmaker(bind=engine))
+    index = SuggestIndex()
+    index.load()
+    assert index.loaded
+    assert sorted(index.suggest("movie")) == [
+        ("movie", 1, "Movie 0"),
+        ("movie", 2, "Movie 1"),
+        ("movie", 3, "Movie 2"),
+    ]
+    assert index.suggest("director 2", kind="director") == [
+        ("director", 3, "Director 2")
+    ]
+
+
+def test_similar_names_tolerate_typos(index):
+    matches = index.similar("the godfahter", kind="movie", limit=2)
+    assert [match[:3] for match in matches] == [
+        ("movie", 1, "The Godfather"),
+        ("movie", 2, "The Godfather Part II"),
+    ]
+    assert 0 < matches[1][3] < matches[0][3] <= 1
+    assert index.similar("Francis Copola")[0][:3] == (
+        "director",
+        1,
+        "Francis Ford Coppola",
+    )
+
+
+def test_similar_names_of_one_kind_above_the_threshold(index):
+    assert index.similar("godfather", kind="actor") == []
+    assert index.similar("xyzzy") == []
+    assert all(
+        match[3] >= 0.5 for match in index.similar("the godfather", threshold=0.5)
+    )
+
+
+@pytest.mark.parametrize(
+    "title, year, duplicate",
+    [
+        ("the shawshank  REDEMPTION", 2010, True),
+        ("The Shawshank Redemtion", 1994, True),
+        ("The Shawshank Redemtion", 2010, False),
+        ("The Shawshank Redemtion", None, False),
+        ("Another film", 1994, False),
+    ],
+)
+def test_duplicate_titles_are_rejected(
+    catalog_engine, monkeypatch, title, year, duplicate
+):
+    engine = catalog_engine(3)
+    with Session(engine) as db:
+        db.add(
+            DbMovie(
+                title="The Shawshank Redemption",
+                released_date=datetime(1994, 9, 23),
+                plot="Plot",
+            )
+        )
+        db.commit()
+    monkeypatch.setattr(suggest_index_module, "SessionLocal", sessionmaker(bind=engine))
+    index = SuggestIndex()
+    index.load()
+    monkeypatch.setattr(db_movies, "suggest_index", index)
+    request = MovieBase(
+        title=title,
+        released_date=year and datetime(year, 6, 1),
+        plot="Plot",
+        poster_url=None,
+        imdb_id=None,
+    )
+    with Session(engine) as db:
+        if duplicate:
+            with pytest.raises(HTTPException) as error:
+                db_movies.check_duplicate_title(db=db, request=request)
+            assert error.value.status_code == 409
+        else:
+            db_movies.check_duplicate_title(db=db, request=request)
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from db import view_counter as view_counter_module
+from db.models import DbMovie, DbMovieRequest
+from db.suggest_index import SuggestIndex
+from db.view_counter import ViewCounter
+
+
+@pytest.fixture
+def views_engine(catalog_engine, monkeypatch):
+    engine = catalog_engine(2)
+    monkeypatch.setattr(view_counter_module, "engine", engine)
+    monkeypatch.setattr(view_counter_module, "suggest_index", SuggestIndex())
+    return engine
+
+
+def requests_counts(engine):
+    with Session(engine) as db:
+        counts = dict(db.execute(select(DbMovie.id, DbMovie.requests_count)).all())
+        logged = db.scalar(select(func.count()).select_from(DbMovieRequest))
+    return counts, logged
+
+
+def test_views_are_written_in_one_flush(views_engine):
+    counter = ViewCounter()
+    for _ in range(3):
+        counter.record(movie_id=1, user_id=1)
+    counter.record(movie_id=2, user_id=1)
+    # Nothing is written before the flush
+    assert requests_counts(views_engine) == ({1: 0, 2: 0}, 0)
+
+    assert counter.flush() == 4
+    assert requests_counts(views_engine) == ({1: 3, 2: 1}, 4)
+    assert counter.flush() == 0
+
+
+def test_failed_flush_keeps_the_views(views_engine, monkeypatch):
+    counter = ViewCounter()
+    counter.record(movie_id=1, user_id=1)
+    monkeypatch.setattr(view_counter_module, "engine", None)
+    with pytest.raises(AttributeError):
+        counter.flush()
+    monkeypatch.setattr(view_counter_module, "engine", views_engine)
+    assert counter.flush() == 1
+    assert requests_counts(views_engine) == ({1: 1, 2: 0}, 1)
+
+
+def test_sampled_views_keep_their_fractions(views_engine, monkeypatch):
+    counter = ViewCounter(sample_rate=0.4)
+    monkeypatch.setattr(view_counter_module.random, "random", lambda: 0.0)
+    counter.record(movie_id=1, user_id=1)
+    # 2.5 views, the half view waits for the next flush
+    counter.record(movie_id=1, user_id=1)
+    assert counter.flush() == 5
+    counter.record(movie_id=1, user_id=1)
+    counter.record(movie_id=1, user_id=1)
+    assert counter.flush() == 5
+    assert requests_counts(views_engine)[0][1] == 10